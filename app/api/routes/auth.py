@@ -1,74 +1,118 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from app.database.dependencies import get_db  # Importa correctamente get_db
-from app.database.session import SessionLocal
+from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.dependencies import get_async_db, get_async_write_db
 from app.schemas.user import UserCreate
-from app.crud.user import create_user, get_user_by_email, update_user_password
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.schemas.auth import RefreshRequest, TokenResponse
+from app.crud.user import create_user, get_user_by_email, reset_user_password
+from app.crud.refresh_token import (
+    RefreshTokenError, RefreshTokenReuseError, get_token_family, issue_refresh_token, new_family_id,
+    revoke_token_family, revoke_user_tokens, rotate_refresh_token,
+)
+from app.core.security import (
+    verify_password_async, get_password_hash_async, create_access_token, log_failed_login_attempt,
+    create_password_reset_token, decode_password_reset_token,
+)
 from datetime import timedelta
-from app.core.config import settings
-from jose import jwt, JWTError
+from app.core.lookups import lookups
+from app.core.responses import ResponseClass
+from app.core.rate_limit import auth_rate_limiter
+from app.core.mailer import deliver_password_reset
+import logging
 
-router = APIRouter()
+router = APIRouter(default_response_class=ResponseClass)
+logger = logging.getLogger(__name__)
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    user_in_db = get_user_by_email(db, user.email)
+async def register(user: UserCreate, request: Request, db: AsyncSession = Depends(get_async_write_db)):
+    await auth_rate_limiter.check("register", request, user.email)
+    user_in_db = await get_user_by_email(db, user.email)
     if user_in_db:
         return {"error": "Email already registered"}
     #user.password = get_password_hash(user.password)
-    new_user = create_user(db, user)
+    new_user = await create_user(db, user)
     return {"id": new_user.id, "email": new_user.email}
 
 @router.post("/login", summary="Login de usuario")
-async def login_user(email: str, password: str, db: Session = Depends(get_db)):
-    user = get_user_by_email(db, email)
-    print("USUARIO ENCONTRADO:", user)
-    print("CONTRASEÑA RECIBIDA:", password)
-    print("HASH GUARDADO:", user.hashed_password if user else "N/A")
+async def login_user(email: str, password: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    await auth_rate_limiter.check("login", request, email)
+    user = await get_user_by_email(db, email)
+    logger.debug("Intento de login", extra={"user_found": user is not None})
 
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password_async(password, user.hashed_password):
+        log_failed_login_attempt(email)
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
-    # Incluye el ID del usuario en el token
-    #access_token = create_access_token(data={"email": user.email, "role": user.role, "id": user.id})
-    access_token = create_access_token(data={"email": user.email, "role_id": user.role_id, "id": user.id})
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Cada login abre una familia de refresh tokens (sesión)
+    family_id = new_family_id()
+    refresh_token = await issue_refresh_token(db, user.id, family_id)
+    return {"access_token": _access_token(user, family_id), "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+def _access_token(user, family_id: str) -> str:
+    # Incluye el ID del usuario y la sesión (sid) en el token
+    return create_access_token(data={
+        "email": user.email,
+        "role": lookups.roles.name_of(user.role_id),
+        "role_id": user.role_id,
+        "id": user.id,
+        "sid": family_id,
+    })
+
+
+@router.post("/refresh", response_model=TokenResponse, summary="Renovar Access Token")
+async def refresh_access_token(data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Canjea el refresh token por un access token nuevo y un refresh token
+    nuevo (el anterior deja de valer) sin verificar la contraseña.
+    Reutilizar un refresh token ya canjeado revoca la sesión completa.
+    """
+    try:
+        user, refresh_token, family_id = await rotate_refresh_token(db, data.refresh_token)
+    except RefreshTokenReuseError as e:
+        logger.warning("Refresh token reutilizado; sesión revocada")
+        raise HTTPException(status_code=401, detail=str(e))
+    except RefreshTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    return {"access_token": _access_token(user, family_id), "refresh_token": refresh_token}
+
+
+@router.post("/logout", summary="Cerrar Sesión")
+async def logout(data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Revoca la sesión del refresh token: ni él ni los access tokens emitidos
+    para ella vuelven a ser válidos.
+    """
+    family_id = await get_token_family(db, data.refresh_token)
+    if family_id is not None:
+        await revoke_token_family(db, family_id)
+    return {"msg": "Session closed"}
 
 
 @router.post("/forgot-password")
-def forgot_password(email: str, db: Session = Depends(get_db)):
+async def forgot_password(email: str, db: AsyncSession = Depends(get_async_db)):
     # Verificar si el usuario existe
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Generar un token de recuperación válido por 30 minutos
-    token = create_access_token(data={"sub": user.email}, expires_delta=timedelta(minutes=30))
-
-    # Simular envío de correo (implementa un sistema de correos en producción)
-    print(f"Recovery token for {email}: {token}")
+    # Generar un token de recuperación válido por 30 minutos y enviarlo por correo
+    token = create_password_reset_token(user.id, user.email, expires_delta=timedelta(minutes=30))
+    if not await deliver_password_reset(user.email, token):
+        raise HTTPException(status_code=503, detail="Password recovery is not available")
+    logger.info("Token de recuperación enviado", extra={"user_id": user.id})
 
     return {"msg": "Check your email for a recovery link"}
 
 @router.post("/reset-password")
-def reset_password(token: str, new_password: str, db: Session = Depends(get_db)):
-    try:
-        # Decodificar el token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    # Buscar al usuario por correo
-    user = get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def reset_password(token: str, new_password: str, db: AsyncSession = Depends(get_async_write_db)):
+    # Solo se aceptan tokens de recuperación (no access tokens)
+    email = decode_password_reset_token(token)
 
-    # Actualizar la contraseña
-    hashed_password = get_password_hash(new_password)
-    update_user_password(db, user.id, hashed_password)
+    # Actualizar la contraseña (el UPDATE localiza al usuario por correo)
+    hashed_password = await get_password_hash_async(new_password)
+    user_id = await reset_user_password(db, email, hashed_password)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    await revoke_user_tokens(db, user_id)
 
     return {"msg": "Password reset successfully"}
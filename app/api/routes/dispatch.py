@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.dependencies import get_async_write_db
+from app.core.security import get_current_user
+from app.core.dispatch import DriverPosition, run_dispatch_round
+from app.schemas.dispatch import DispatchRoundRequest, DispatchRoundResponse
+from app.core.responses import ResponseClass
+
+router = APIRouter(default_response_class=ResponseClass)
+
+
+@router.post("/run", response_model=DispatchRoundResponse, summary="Ejecutar Ronda de Despacho")
+async def run_dispatch(
+    data: DispatchRoundRequest,
+    db: AsyncSession = Depends(get_async_write_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Asigna todos los servicios pendientes a los conductores indicados
+    minimizando la distancia total de recogida.
+    ⚠️ **Solo accesible para administradores.**
+    """
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
+    drivers = [DriverPosition(d.driver_id, d.lat, d.lng) for d in data.drivers]
+    return await run_dispatch_round(db, drivers, data.max_distance_km)
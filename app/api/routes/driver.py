@@ -0,0 +1,62 @@
+import time
+from datetime import timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.core.location_store import driver_locations
+from app.crud.service import get_assigned_driver_ids
+from app.database.dependencies import get_async_read_db
+from app.schemas.location import DriverLocationIn, DriverLocationOut
+from app.core.responses import ResponseClass
+
+router = APIRouter(default_response_class=ResponseClass)
+
+
+@router.post("/me/location", status_code=status.HTTP_204_NO_CONTENT, summary="Reportar Ubicación")
+async def report_location(
+    data: DriverLocationIn,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Registra la posición GPS actual del conductor autenticado.
+    Solo actualiza el almacén en memoria; la persistencia se hace en lote.
+    """
+    if current_user.get("role") != "driver":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo conductores pueden reportar ubicación")
+    ts = None
+    if data.recorded_at is not None:
+        recorded_at = data.recorded_at
+        if recorded_at.tzinfo is None:
+            recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+        ts = recorded_at.timestamp()
+        # El reloj del dispositivo no es de fiar: solo se acepta un margen pequeño
+        now = time.time()
+        if not now - settings.LOCATION_MAX_BACKDATE_SECONDS <= ts <= now + settings.LOCATION_MAX_CLOCK_SKEW_SECONDS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="recorded_at fuera del rango aceptado respecto a la hora del servidor"
+            )
+    driver_locations.update(current_user["id"], data.lat, data.lng, data.heading, data.speed_kmh, ts)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/locations", response_model=List[DriverLocationOut], summary="Última Ubicación de Conductores")
+async def get_locations(
+    ids: List[int] = Query(..., max_length=500),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Devuelve la última posición conocida de los conductores indicados.
+    Los administradores ven a cualquiera; los demás, solo su propia
+    posición y la de los conductores asignados a sus servicios en curso.
+    """
+    if current_user.get("role") != "admin":
+        requested = set(ids) - {current_user["id"]}
+        if requested and requested - await get_assigned_driver_ids(db, current_user["id"], list(requested)):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
+    return driver_locations.get_many(ids)
@@ -0,0 +1,37 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Security, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import settings
+from app.core.metrics import render_prometheus
+from app.core.security import get_current_user
+
+router = APIRouter()
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def require_metrics_access(credentials: Optional[HTTPAuthorizationCredentials] = Security(_bearer)) -> None:
+    """
+    Acceso a /metrics: el scraper envía METRICS_TOKEN como bearer; sin él
+    (o si no está configurado) hace falta un access token de administrador.
+    """
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autenticado",
+                            headers={"WWW-Authenticate": "Bearer"})
+    if settings.METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), settings.METRICS_TOKEN.encode()):
+        return
+    current_user = await get_current_user(credentials)
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False,
+            dependencies=[Depends(require_metrics_access)])
+def metrics():
+    """
+    Métricas del proceso en formato de texto de Prometheus.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,103 +1,281 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import json
+from pydantic import ValidationError
 
-from app.database.dependencies import get_db
+from app.database.dependencies import get_async_read_db, get_async_write_db
+from app.core.config import settings
 from app.core.security import get_current_user
-from app.database.models import Service
-from app.crud.service import get_user_services
-from app.schemas.service import ServiceResponse, ServiceRequestCreate
-from app.crud.service import update_service_status
+from app.core.spatial_index import pending_services_index
+from app.core.events import broker, format_sse, service_event_payload, sse_stream
+from app.core.pagination import InvalidCursorError, ndjson_stream
+from app.core.lookups import lookups
+from app.crud.service import get_services, get_service_by_id, get_user_services, create_service_request, create_service_requests, iter_services_export
+from app.schemas.service import ServiceResponse, ServiceActionResponse, ServiceRequestCreate, NearbyServiceResponse, BatchServiceResponse
+from app.schemas.pricing import QuoteRequest, QuoteResponse
+from app.core.pricing import quote_engine
+from app.crud.service import update_service_status, ServiceStateError, ServiceNotFoundError, ServiceForbiddenError
+from app.core.responses import ResponseClass, model_response
+from app.core.etag import cached_not_modified, conditional_response
 
-router = APIRouter()
+router = APIRouter(default_response_class=ResponseClass)
 
 @router.get("/", response_model=List[ServiceResponse])
-def get_services_endpoint(db: Session = Depends(get_db)):
-    services = db.query(Service).all()
-    return services
+async def get_services_endpoint(
+    limit: int = Query(settings.PAGINATION_DEFAULT_LIMIT, ge=1, le=settings.PAGINATION_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    status_name: Optional[str] = Query(None, alias="status"),
+    client_id: Optional[int] = None,
+    driver_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Lista servicios del más reciente al más antiguo, paginados por cursor.
+    Si hay más resultados, la respuesta incluye la cabecera `X-Next-Cursor`.
+    """
+    try:
+        services, next_cursor = await get_services(db, limit, cursor, status_name, client_id, driver_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Al devolver la respuesta ya construida, la cabecera va en `headers`
+    return model_response(List[ServiceResponse], services, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
 
 @router.post("/request", response_model=ServiceResponse)
-def create_service_request(service: ServiceRequestCreate, db: Session = Depends(get_db),current_user: dict = Depends(get_current_user)):
-    new_service = Service(
-        client_id=service.client_id,
-        pickup_lat=service.pickup_lat,
-        pickup_lng=service.pickup_lng,
-        destination_lat=service.destination_lat,
-        destination_lng=service.destination_lng,
-        status=1,
-        created_by=current_user["email"]  
+async def create_service_request_endpoint(service: ServiceRequestCreate, db: AsyncSession = Depends(get_async_write_db),current_user: dict = Depends(get_current_user)):
+    return await create_service_request(db, service, current_user["email"])
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc']) or 'item'}: {e['msg']}" for e in error.errors())
+
+async def _parse_batch(request: Request):
+    """
+    Valida el cuerpo en una sola pasada. Acepta un arreglo JSON o NDJSON
+    (una solicitud por línea, leída a medida que llega).
+    Devuelve (válidos: [(posición, datos)], errores: [(posición, mensaje)]).
+    """
+    valid, errors = [], []
+
+    def add(index: int, validate):
+        if index >= settings.SERVICE_BATCH_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"El lote supera {settings.SERVICE_BATCH_MAX_ITEMS} solicitudes"
+            )
+        try:
+            valid.append((index, validate()))
+        except ValidationError as e:
+            errors.append((index, _validation_message(e)))
+
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        index, buffer = 0, b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    add(index, lambda line=line: ServiceRequestCreate.model_validate_json(line))
+                    index += 1
+        if buffer.strip():
+            add(index, lambda: ServiceRequestCreate.model_validate_json(buffer))
+        return valid, errors
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El cuerpo no es JSON válido")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Se esperaba un arreglo JSON o NDJSON")
+    for index, item in enumerate(items):
+        add(index, lambda item=item: ServiceRequestCreate.model_validate(item))
+    return valid, errors
+
+@router.post("/batch", response_model=BatchServiceResponse, summary="Crear Servicios en Lote")
+async def create_service_batch(
+    request: Request,
+    db: AsyncSession = Depends(get_async_write_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Crea muchas solicitudes de servicio de una vez (socios de flota y
+    aseguradoras). El cuerpo es un arreglo JSON o NDJSON
+    (`Content-Type: application/x-ndjson`) de objetos como los de `/request`.
+    Los errores se reportan por posición sin invalidar el resto del lote.
+    """
+    valid, errors = await _parse_batch(request)
+    created, insert_errors = await create_service_requests(db, valid, current_user["email"])
+    return {
+        "created": [{"index": index, "id": service.id} for index, service in created],
+        "errors": [{"index": index, "error": message} for index, message in sorted(errors + insert_errors)],
+    }
+
+@router.post("/quote", response_model=QuoteResponse, summary="Cotizar Servicio")
+def quote_service(data: QuoteRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Precio y duración estimada del trayecto antes de solicitar el servicio.
+    Las cotizaciones repetidas desde la misma zona se sirven desde caché.
+    """
+    return quote_engine.quote(data.pickup_lat, data.pickup_lng, data.destination_lat, data.destination_lng)._asdict()
+
+@router.post("/quote/batch", response_model=List[QuoteResponse], summary="Cotizar Servicios en Lote")
+def quote_services_batch(items: List[QuoteRequest], current_user: dict = Depends(get_current_user)):
+    """
+    Cotiza muchos trayectos de una vez (socios que cotizan cientos de
+    trabajos); se calculan vectorizados, en el mismo orden recibido.
+    """
+    if len(items) > settings.PRICING_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"El lote supera {settings.PRICING_BATCH_MAX_ITEMS} cotizaciones"
+        )
+    if not items:
+        return []
+    quotes = quote_engine.quote_many(
+        [i.pickup_lat for i in items], [i.pickup_lng for i in items],
+        [i.destination_lat for i in items], [i.destination_lng for i in items],
+    )
+    return [q._asdict() for q in quotes]
+
+@router.get("/nearby", response_model=List[NearbyServiceResponse], summary="Servicios pendientes cercanos")
+def get_nearby_services(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=settings.NEARBY_MAX_RADIUS_KM),
+    limit: int = Query(20, ge=1, le=settings.NEARBY_MAX_RESULTS),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Devuelve los servicios pendientes más cercanos dentro del radio indicado,
+    ordenados por distancia. Se resuelve con el índice espacial en memoria,
+    sin consultar la base de datos.
+    """
+    hits = pending_services_index.nearby(lat, lng, radius_km, limit)
+    return [{**entry._asdict(), "distance_km": round(distance, 3)} for entry, distance in hits]
+
+@router.get("/export", summary="Exportar Servicios (NDJSON)")
+async def export_services(
+    status_name: Optional[str] = Query(None, alias="status"),
+    client_id: Optional[int] = None,
+    driver_id: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Exporta todos los servicios que cumplen los filtros como NDJSON (una fila
+    JSON por línea), leyendo con un cursor de servidor.
+    ⚠️ **Solo accesible para administradores.**
+    """
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
+    if status_name is not None and status_name not in lookups.statuses.names():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Estado de servicio desconocido: {status_name}")
+    return StreamingResponse(
+        ndjson_stream(iter_services_export(status_name, client_id, driver_id)),
+        media_type="application/x-ndjson",
     )
-    db.add(new_service)
-    db.commit()
-    db.refresh(new_service)
-    return new_service
 
 @router.get("/{service_id}", response_model=ServiceResponse)
-def get_service(service_id: int, db: Session = Depends(get_db)):
-    service = db.query(Service).filter(Service.id == service_id).first()
+async def get_service(service_id: int, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Detalle de un servicio. Admite `If-None-Match`: si el ETag sigue
+    vigente responde 304 (desde la caché de versiones, sin consultar la BD).
+    """
+    not_modified = cached_not_modified(request, "service", service_id)
+    if not_modified is not None:
+        return not_modified
+    service = await get_service_by_id(db, service_id)
     if not service:
-        return {"error": "Service not found"}
-    return service
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+    return conditional_response(request, "service", service, ServiceResponse)
 
-@router.put("/services/{service_id}/accept", summary="Aceptar Servicio")
-async def accept_service(
+@router.get("/{service_id}/events", summary="Suscribirse a un Servicio (SSE)")
+async def service_events(
     service_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_user)
 ):
-    if current_user.get("role") != "driver":
-        raise HTTPException(status_code=403, detail="Solo conductores pueden aceptar servicios")
-
-    service = db.query(Service).filter(Service.id == service_id).first()
+    """
+    Flujo Server-Sent Events con los cambios de estado del servicio.
+    El primer evento es el estado actual, así el cliente no necesita hacer polling.
+    """
+    service = await get_service_by_id(db, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
+    initial = format_sse("service.snapshot", service_event_payload(service))
+    await db.close()
 
-    if service.client_id == current_user["id"]:
-        raise HTTPException(status_code=403, detail="No puedes aceptar tu propio servicio")
+    subscription = broker.subscribe([f"service:{service_id}"])
+    return StreamingResponse(
+        sse_stream(request, subscription, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
+async def _apply_transition(db: AsyncSession, service_id: int, new_status: str, user_id: int):
+    """
+    Ejecuta la transición y traduce los errores de estado a respuestas HTTP.
+    """
     try:
-        service = update_service_status(db, service_id, "accepted", current_user["id"])
-        return {"message": "Servicio aceptado exitosamente", "service": service}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        return await update_service_status(db, service_id, new_status, user_id)
+    except ServiceNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ServiceForbiddenError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except ServiceStateError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@router.put("/services/{service_id}/complete", summary="Completar Servicio")
-async def complete_service(
+@router.put("/services/{service_id}/accept", response_model=ServiceActionResponse, summary="Aceptar Servicio")
+async def accept_service(
     service_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_write_db),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user.get("role") != "driver":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo conductores pueden completar servicios")
+        raise HTTPException(status_code=403, detail="Solo conductores pueden aceptar servicios")
+
+    service = await _apply_transition(db, service_id, "accepted", current_user["id"])
+    return {"message": "Servicio aceptado exitosamente", "service": service}
 
-    service = db.query(Service).filter(Service.id == service_id).first()
-    if not service:
-        raise HTTPException(status_code=404, detail="Servicio no encontrado")
 
-    if service.client_id == current_user["id"]:
-        raise HTTPException(status_code=403, detail="No puedes completar tu propio servicio")
+@router.put("/services/{service_id}/complete", response_model=ServiceResponse, summary="Completar Servicio")
+async def complete_service(
+    service_id: int,
+    db: AsyncSession = Depends(get_async_write_db),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user.get("role") != "driver":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo conductores pueden completar servicios")
 
-    return update_service_status(db, service_id, "completed", current_user["id"])
+    return await _apply_transition(db, service_id, "completed", current_user["id"])
 
 
-@router.put("/services/{service_id}/cancel", summary="Cancelar Servicio")
+@router.put("/services/{service_id}/cancel", response_model=ServiceResponse, summary="Cancelar Servicio")
 async def cancel_service(
     service_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_write_db),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user.get("role") != "client":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo clientes pueden cancelar servicios")
-    return update_service_status(db, service_id, "cancelled", current_user["id"])
+    return await _apply_transition(db, service_id, "cancelled", current_user["id"])
 
-@router.get("/services/user/{user_id}", summary="Listar Servicios por Usuario")
+@router.get("/services/user/{user_id}", response_model=List[ServiceResponse], summary="Listar Servicios por Usuario")
 async def list_user_services(
     user_id: int,
-    db: Session = Depends(get_db),
+    limit: int = Query(settings.PAGINATION_DEFAULT_LIMIT, ge=1, le=settings.PAGINATION_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    archived: bool = Query(False, description="Incluir el histórico archivado (servicios terminados antiguos)"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["id"] != user_id and current_user.get("role") != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
-    return get_user_services(db, user_id)
+    try:
+        services, next_cursor = await get_user_services(db, user_id, limit, cursor, include_archived=archived)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return model_response(List[ServiceResponse], services, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
 
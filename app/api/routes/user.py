@@ -1,71 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.database.dependencies import get_db
-from app.crud.user import get_users, get_user_by_id, get_user_by_email, update_user_profile, update_user_password
+from app.database.dependencies import get_async_read_db, get_async_write_db
+from app.crud.user import get_users, iter_users_export, get_user_by_id, get_user_by_email, update_user_profile, update_user_password, delete_user
 from app.schemas.user import UserOut, UpdateUserSchema, UpdatePasswordSchema  
-from app.core.security import get_current_user, verify_password, get_password_hash
+from app.core.config import settings
+from app.core.events import broker, sse_stream
+from app.core.pagination import ndjson_stream
+from app.core.lookups import lookups
+from app.core.security import get_current_user, verify_password_async, get_password_hash_async
+from app.core.responses import ResponseClass, model_response
+from app.core.rate_limit import auth_rate_limiter
+from app.core.etag import cached_not_modified, conditional_response
+from app.crud.refresh_token import revoke_user_tokens
 
-router = APIRouter()
+router = APIRouter(default_response_class=ResponseClass)
+
+
+def _require_admin(current_user: dict) -> None:
+    if current_user.get("role") != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a esta ruta."
+        )
 
 
 # Obtener lista de usuarios (Solo Administradores)
 @router.get("/", response_model=List[UserOut], summary="Listar Usuarios", description="Devuelve una lista de todos los usuarios registrados. Solo accesible para administradores.")
 async def get_all_users(
-    db: Session = Depends(get_db),
+    limit: int = Query(settings.PAGINATION_DEFAULT_LIMIT, ge=1, le=settings.PAGINATION_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    role: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Devuelve una lista de todos los usuarios registrados.  
+    Devuelve una página de usuarios registrados; si hay más, la respuesta
+    incluye la cabecera `X-Next-Cursor`.  
     ⚠️ **Solo accesible para administradores.**
     """
-    if current_user.get("role") != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permisos para acceder a esta ruta."
-        )
-    
-    users = get_users(db)
-    if not users:
+    _require_admin(current_user)
+    try:
+        role_id = lookups.roles.id_of(role) if role else None
+        users, next_cursor = await get_users(db, limit, cursor, role_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not users and not cursor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No se encontraron usuarios."
         )
-    return users
+    return model_response(List[UserOut], users, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+
+# Exportar usuarios (Solo Administradores)
+@router.get("/export", summary="Exportar Usuarios (NDJSON)", description="Exporta todos los usuarios como NDJSON en streaming. Solo accesible para administradores.")
+async def export_users(
+    role: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Exporta los usuarios como NDJSON leyendo con un cursor de servidor, así
+    la memoria no crece con el número de filas.  
+    ⚠️ **Solo accesible para administradores.**
+    """
+    _require_admin(current_user)
+    try:
+        role_id = lookups.roles.id_of(role) if role else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return StreamingResponse(ndjson_stream(iter_users_export(role_id)), media_type="application/x-ndjson")
+
+
+# Eventos en tiempo real del usuario autenticado
+@router.get("/me/events", summary="Suscribirse a mis Servicios (SSE)", description="Flujo Server-Sent Events con los cambios de los servicios del usuario autenticado.")
+async def my_events(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Envía un evento cada vez que se crea o cambia de estado un servicio en el
+    que participa el usuario (como cliente o como conductor).
+    """
+    subscription = broker.subscribe([f"user:{current_user['id']}"])
+    return StreamingResponse(
+        sse_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # Obtener un usuario por ID (Autenticado)
 @router.get("/{user_id}", response_model=UserOut, summary="Obtener Usuario por ID", description="Devuelve los detalles de un usuario específico mediante su ID.")
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Devuelve los detalles de un usuario específico mediante su ID.  
+    Devuelve los detalles de un usuario específico mediante su ID.
+    Admite `If-None-Match`: si el ETag sigue vigente responde 304.  
     ⚠️ **Accesible para usuarios autenticados.**
     """
-    user = get_user_by_id(db, user_id)
+    not_modified = cached_not_modified(request, "user", user_id)
+    if not_modified is not None:
+        return not_modified
+    user = await get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuario no encontrado."
         )
-    return user
+    return conditional_response(request, "user", user, UserOut)
 
 # Actualizar Perfil del Usuario Autenticado
 @router.put("/me", summary="Actualizar Perfil de Usuario", description="Permite actualizar el nombre y correo electrónico del usuario autenticado.")
 async def update_profile(
     data: UpdateUserSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_write_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Actualiza el nombre y/o correo electrónico del usuario autenticado.  
     ⚠️ **Accesible para usuarios autenticados.**
     """
-    updated_user = update_user_profile(db, current_user["email"], data.name, data.email)
+    updated_user = await update_user_profile(db, current_user["email"], data.name, data.email)
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
     return {
@@ -74,51 +136,52 @@ async def update_profile(
             "id": updated_user.id,
             "name": updated_user.name,
             "email": updated_user.email,
-            "role": updated_user.role
+            "role": lookups.roles.name_of(updated_user.role_id)
         }
     }
 
 @router.put("/me/password", summary="Actualizar Contraseña", description="Permite actualizar la contraseña del usuario autenticado.")
 async def update_password(
     data: UpdatePasswordSchema,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_write_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Actualiza la contraseña de un usuario autenticado.
     ⚠️ **Requiere autenticación.**
     """
-    user = get_user_by_email(db, current_user["email"])
-    if not verify_password(data.old_password, user.hashed_password):
+    await auth_rate_limiter.check("change_password", request, current_user["email"])
+    user = await get_user_by_email(db, current_user["email"])
+    if not await verify_password_async(data.old_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="La contraseña actual es incorrecta."
         )
 
-    new_hashed_password = get_password_hash(data.new_password)
-    update_user_password(db, user.id, new_hashed_password)
+    new_hashed_password = await get_password_hash_async(data.new_password)
+    await update_user_password(db, user.id, new_hashed_password)
+    # Las sesiones abiertas con la contraseña anterior dejan de valer
+    await revoke_user_tokens(db, user.id)
 
     return {"message": "Contraseña actualizada correctamente"}
 
 @router.delete("/me", summary="Eliminar Cuenta de Usuario", description="Permite eliminar la cuenta del usuario autenticado.")
 async def delete_account(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_write_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Elimina la cuenta del usuario autenticado.
     ⚠️ **Requiere autenticación.**
     """
-    user = get_user_by_email(db, current_user["email"])
-    if not user:
+    user_id = await delete_user(db, current_user["email"])
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuario no encontrado"
         )
 
-    db.delete(user)
-    db.commit()
-
     return {"message": "Cuenta eliminada correctamente"}
 
 
@@ -1,14 +1,137 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DATABASE_READ_URL: Optional[str] = None  # réplica de lectura; sin ella todo va al primario
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # tras escribir, las lecturas del cliente van al primario
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # Entrega del token de recuperación de contraseña (SMTP)
+    SMTP_HOST: Optional[str] = None  # sin servidor, forgot-password responde 503
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    MAIL_FROM: str = "no-reply@localhost"
+    PASSWORD_RESET_URL: str = ""  # p. ej. https://app/reset?token={token}; vacío envía el token tal cual
+    PASSWORD_RESET_LOG_TOKENS: bool = False  # solo desarrollo: escribe el token en el log en lugar de enviarlo
+
+    # Conjunto de sesiones revocadas (filtro de Bloom respaldado por la BD)
+    REVOCATION_BLOOM_CAPACITY: int = 100000  # revocaciones esperadas dentro de la vida de un access token
+    REVOCATION_BLOOM_FP_RATE: float = 0.001  # los positivos se confirman en la BD
+    REVOCATION_SYNC_SECONDS: float = 10.0  # recarga de revocaciones hechas por otros workers
     PORT: int = 8000  # Puerto por defecto
     HOST: str = "0.0.0.0"  # Host por defecto para producción
 
+    # Búsqueda de servicios cercanos
+    NEARBY_CELL_SIZE_DEG: float = 0.05  # ~5.5 km por celda en el ecuador
+    NEARBY_MAX_RADIUS_KM: float = 50.0
+    NEARBY_MAX_RESULTS: int = 100
+
+    # Despacho por lotes
+    DISPATCH_INTERVAL_SECONDS: float = 5.0  # 0 desactiva la ronda periódica
+    DISPATCH_MAX_DISTANCE_KM: float = 25.0
+    DISPATCH_OPTIMAL_MAX_CELLS: int = 2_000_000  # servicios × conductores antes de usar greedy
+
+    # Ubicación de conductores
+    LOCATION_FLUSH_INTERVAL_SECONDS: float = 2.0
+    LOCATION_FLUSH_BATCH_SIZE: int = 1000
+    DRIVER_LOCATION_MAX_AGE_SECONDS: float = 60.0  # antigüedad máxima para considerar a un conductor disponible
+    LOCATION_MAX_CLOCK_SKEW_SECONDS: float = 30.0  # recorded_at en el futuro tolerado (se ajusta a la hora del servidor)
+    LOCATION_MAX_BACKDATE_SECONDS: float = 3600.0  # recorded_at más antiguo aceptado (posiciones en cola sin red)
+
+    # Pool de hashing de contraseñas (bcrypt)
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = número de CPUs
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # operaciones en espera antes de responder 503
+
+    # Límite de intentos en endpoints con bcrypt (login, registro, contraseña)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_IP_PER_MINUTE: float = 30.0
+    RATE_LIMIT_IP_BURST: int = 10
+    RATE_LIMIT_EMAIL_PER_MINUTE: float = 5.0
+    RATE_LIMIT_EMAIL_BURST: int = 5
+    RATE_LIMIT_MAX_KEYS: int = 100000  # buckets en memoria antes de desalojar los más antiguos
+
+    # Caché de tokens verificados (0 la desactiva)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+
+    # Eventos en tiempo real (SSE)
+    EVENTS_SUBSCRIBER_QUEUE_SIZE: int = 16
+    EVENTS_MAX_DROPPED: int = 64  # descartes tolerados antes de desconectar a un suscriptor lento
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+
+    # Paginación de listados y exportaciones
+    PAGINATION_DEFAULT_LIMIT: int = 50
+    PAGINATION_MAX_LIMIT: int = 500
+    EXPORT_CHUNK_SIZE: int = 1000  # filas por lote del cursor de servidor
+
+    # Carga masiva de solicitudes de servicio
+    SERVICE_BATCH_MAX_ITEMS: int = 10000
+    SERVICE_BATCH_CHUNK_SIZE: int = 500  # filas por INSERT ... RETURNING y por transacción
+
+    # Archivo de servicios terminados: tabla caliente + histórico NDJSON gzip por mes
+    # Borra filas de la tabla: desactivado por defecto; al activarlo, SERVICE_ARCHIVE_DIR debe ser
+    # una ruta absoluta en un volumen persistente (compartido si hay varios hosts)
+    SERVICE_ARCHIVE_DIR: str = ""
+    SERVICE_ARCHIVE_AFTER_DAYS: int = 0  # antigüedad (created_at) para archivar; 0 desactiva el archivo
+    SERVICE_ARCHIVE_INTERVAL_SECONDS: float = 3600.0  # 0 desactiva el job periódico
+    SERVICE_ARCHIVE_BATCH_SIZE: int = 5000  # filas por DELETE ... RETURNING y por transacción
+    SERVICE_ARCHIVE_USER_SHARDS: int = 64  # grupos de usuarios por mes; una lectura solo abre el de su usuario
+
+    # Cotización de tarifas y ETA
+    PRICING_CURRENCY: str = "DOP"
+    PRICING_BASE_FARE: float = 1500.0  # enganche de la grúa
+    PRICING_MIN_FARE: float = 2000.0
+    # Tramos (hasta_km, precio_por_km); el último cubre cualquier distancia mayor
+    PRICING_TARIFF_BANDS: list[tuple[float, float]] = [(10.0, 90.0), (50.0, 70.0), (1e9, 55.0)]
+    PRICING_ROAD_FACTOR: float = 1.3  # km por carretera ≈ km en línea recta × factor
+    PRICING_AVG_SPEED_KMH: float = 35.0
+    PRICING_CACHE_CELL_DEG: float = 0.001  # ~110 m: cotizaciones dentro de la misma celda se reutilizan
+    PRICING_CACHE_MAX_ENTRIES: int = 100000
+    PRICING_BATCH_MAX_ITEMS: int = 1000
+
+    # Logging estructurado (JSON, escritura en segundo plano)
+    LOG_LEVEL: str = "INFO"
+    LOG_DIR: str = "logs"
+    LOG_FILE: str = "backend.jsonl"  # admite {pid} para un archivo por worker
+    LOG_ROTATION: str = "size"  # "size" o "time"
+    LOG_MAX_BYTES: int = 50 * 1024 * 1024
+    LOG_ROTATE_WHEN: str = "midnight"
+    LOG_BACKUP_COUNT: int = 10
+    LOG_QUEUE_SIZE: int = 10000  # registros en espera antes de descartar
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01  # fracción de registros DEBUG que se escriben
+    LOG_STDOUT: bool = False
+    LOG_ACCESS: bool = True  # un registro por petición con ruta, estado y latencia
+
+    # Serialización de respuestas con orjson / TypeAdapter
+    FAST_JSON_RESPONSES: bool = True
+
+    # ETags de los GET de detalle (servicio, usuario)
+    ETAG_CACHE_MAX_ENTRIES: int = 100000  # 0 desactiva la caché de versiones (siempre se consulta la BD)
+    ETAG_CACHE_TTL_SECONDS: float = 5.0  # cota de cuánto tarda un worker en ver escrituras hechas en otro
+
+    # Instrumentación de consultas por petición
+    QUERY_BUDGET_PER_REQUEST: int = 0  # 0 = sin presupuesto
+    QUERY_BUDGET_ENFORCE: bool = False  # en dev/test: responder 500 si una ruta lo excede
+
+    # /metrics: bearer del scraper de Prometheus; sin él solo entran administradores
+    METRICS_TOKEN: Optional[str] = None
+
+    # Servidor de producción (app/server.py) y pools por worker
+    WEB_WORKERS: int = 1  # 0 = número de CPUs; más de uno exige WEB_ALLOW_PER_PROCESS_STATE
+    WEB_ALLOW_PER_PROCESS_STATE: bool = False  # aceptar que SSE, índice espacial, despacho, etc. sean por worker
+    WEB_GRACEFUL_TIMEOUT_SECONDS: int = 30  # espera a las peticiones en curso al reiniciar/detener
+    DB_CONNECTION_BUDGET: int = 80  # conexiones a PostgreSQL entre todos los workers (por debajo de max_connections)
+    DB_SYNC_POOL_SIZE: int = 2  # por worker: arranque, migraciones y volcado de ubicaciones
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.spatial_index import pending_services_index
+from app.utils.geo import EARTH_RADIUS_KM, haversine_matrix_km, unit_vectors
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # pragma: no cover - scipy es opcional, se usa el greedy
+    linear_sum_assignment = None
+
+logger = logging.getLogger(__name__)
+
+# Costo asignado a los pares fuera del radio máximo en el solver óptimo
+_INFEASIBLE_COST = 1e9
+
+
+class DriverPosition(NamedTuple):
+    driver_id: int
+    lat: float
+    lng: float
+
+
+class Assignment(NamedTuple):
+    service_id: int
+    driver_id: int
+    distance_km: float
+
+
+# --------------------------------------------------------------------
+# 🧮 Solvers de asignación
+# --------------------------------------------------------------------
+def _solve_optimal(service_ids, service_lat, service_lng, driver_ids, driver_lat, driver_lng, max_distance_km):
+    """
+    Asignación global de costo mínimo (suma de distancias de recogida).
+    """
+    cost = haversine_matrix_km(driver_lat, driver_lng, service_lat, service_lng)
+    cost[cost > max_distance_km] = _INFEASIBLE_COST
+    rows, cols = linear_sum_assignment(cost)
+    return [
+        Assignment(int(service_ids[c]), int(driver_ids[r]), float(cost[r, c]))
+        for r, c in zip(rows, cols)
+        if cost[r, c] < _INFEASIBLE_COST
+    ]
+
+
+def _solve_greedy(service_ids, service_lat, service_lng, driver_ids, driver_lat, driver_lng, max_distance_km,
+                  candidates: int = 8, max_rounds: int = 4):
+    """
+    Aproximación greedy para conjuntos grandes: cada conductor propone sus
+    `candidates` servicios más cercanos, se aceptan los pares más cortos
+    primero y se repite con lo que queda libre.
+    """
+    svc_vecs = unit_vectors(service_lat, service_lng)
+    drv_vecs = unit_vectors(driver_lat, driver_lng)
+    # u·v es monótono con la distancia: se ordena sin calcular arcsin
+    min_dot = math.cos(max_distance_km / EARTH_RADIUS_KM)
+
+    free_s = np.arange(len(service_ids))
+    free_d = np.arange(len(driver_ids))
+    pairs = []
+    for _ in range(max_rounds):
+        if not len(free_s) or not len(free_d):
+            break
+        dot = drv_vecs[free_d] @ svc_vecs[free_s].T
+        k = min(candidates, len(free_s))
+        cand = np.argpartition(-dot, k - 1, axis=1)[:, :k]
+        cand_dot = np.take_along_axis(dot, cand, axis=1).ravel()
+        cand_d = np.repeat(np.arange(len(free_d)), k)
+        cand_s = cand.ravel()
+
+        feasible = cand_dot >= min_dot
+        cand_dot, cand_d, cand_s = cand_dot[feasible], cand_d[feasible], cand_s[feasible]
+        order = np.argsort(-cand_dot, kind="stable")
+
+        taken_s = np.zeros(len(free_s), dtype=bool)
+        taken_d = np.zeros(len(free_d), dtype=bool)
+        new_pairs = 0
+        for e in order:
+            d, s = cand_d[e], cand_s[e]
+            if taken_d[d] or taken_s[s]:
+                continue
+            taken_d[d] = taken_s[s] = True
+            pairs.append((free_s[s], free_d[d], cand_dot[e]))
+            new_pairs += 1
+        if not new_pairs:
+            break
+
+        # Solo siguen los conductores que tenían algún candidato dentro del radio
+        has_candidate = np.zeros(len(free_d), dtype=bool)
+        has_candidate[cand_d] = True
+        free_d = free_d[~taken_d & has_candidate]
+        free_s = free_s[~taken_s]
+
+    return [
+        Assignment(
+            int(service_ids[s]),
+            int(driver_ids[d]),
+            2 * EARTH_RADIUS_KM * math.asin(math.sqrt(max(0.0, (1.0 - dot) * 0.5))),
+        )
+        for s, d, dot in pairs
+    ]
+
+
+def compute_assignment(services, drivers, max_distance_km: float, optimal_max_cells: Optional[int] = None):
+    """
+    Calcula la asignación servicio → conductor que minimiza la distancia total
+    de recogida. Usa el solver óptimo mientras la matriz (servicios × conductores)
+    no supere `optimal_max_cells`; a partir de ahí recurre al greedy.
+    Devuelve (asignaciones, nombre_del_solver).
+    """
+    if not services or not drivers:
+        return [], "none"
+    if optimal_max_cells is None:
+        optimal_max_cells = settings.DISPATCH_OPTIMAL_MAX_CELLS
+
+    service_ids = np.fromiter((s.id for s in services), dtype=np.int64, count=len(services))
+    service_lat = np.fromiter((s.pickup_lat for s in services), dtype=np.float64, count=len(services))
+    service_lng = np.fromiter((s.pickup_lng for s in services), dtype=np.float64, count=len(services))
+    driver_ids = np.fromiter((d.driver_id for d in drivers), dtype=np.int64, count=len(drivers))
+    driver_lat = np.fromiter((d.lat for d in drivers), dtype=np.float64, count=len(drivers))
+    driver_lng = np.fromiter((d.lng for d in drivers), dtype=np.float64, count=len(drivers))
+    args = (service_ids, service_lat, service_lng, driver_ids, driver_lat, driver_lng, max_distance_km)
+
+    if linear_sum_assignment is not None and len(services) * len(drivers) <= optimal_max_cells:
+        return _solve_optimal(*args), "optimal"
+    return _solve_greedy(*args), "greedy"
+
+
+# --------------------------------------------------------------------
+# 🚚 Ronda de despacho
+# --------------------------------------------------------------------
+async def _busy_driver_ids(db: AsyncSession, driver_ids: list[int]) -> set[int]:
+    from app.core.lookups import lookups
+    from app.database.models import Service
+
+    if not driver_ids:
+        return set()
+    result = await db.execute(
+        select(Service.driver_id)
+        .where(Service.driver_id.in_(driver_ids), Service.status_id == lookups.statuses.id_of("accepted"))
+        .distinct()
+    )
+    return set(result.scalars().all())
+
+
+async def run_dispatch_round(db: AsyncSession, drivers: list[DriverPosition], max_distance_km: Optional[float] = None) -> dict:
+    """
+    Ejecuta una ronda de despacho: toma los servicios pendientes del índice
+    espacial y los conductores disponibles, calcula la asignación global y
+    la aplica con `update_service_status`. Los servicios que otro conductor
+    aceptó mientras tanto se cuentan como conflictos.
+    """
+    from app.crud.service import update_service_status
+
+    started = time.perf_counter()
+    if max_distance_km is None:
+        max_distance_km = settings.DISPATCH_MAX_DISTANCE_KM
+
+    busy = await _busy_driver_ids(db, [d.driver_id for d in drivers])
+    available = [d for d in drivers if d.driver_id not in busy]
+    services = pending_services_index.snapshot()
+
+    # El cálculo es CPU puro: se hace fuera del event loop
+    assignments, solver = await asyncio.to_thread(compute_assignment, services, available, max_distance_km)
+    solved_ms = (time.perf_counter() - started) * 1000
+
+    applied, conflicts = [], 0
+    for assignment in assignments:
+        try:
+            await update_service_status(db, assignment.service_id, "accepted", assignment.driver_id)
+            applied.append(assignment)
+        except ValueError:
+            conflicts += 1
+
+    assigned_services = {a.service_id for a in applied}
+    assigned_drivers = {a.driver_id for a in applied}
+    return {
+        "solver": solver,
+        "assignments": [a._asdict() for a in applied],
+        "unassigned_services": [s.id for s in services if s.id not in assigned_services],
+        "idle_drivers": [d.driver_id for d in available if d.driver_id not in assigned_drivers],
+        "conflicts": conflicts,
+        "solve_ms": round(solved_ms, 3),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+class Dispatcher:
+    """
+    Ejecuta rondas de despacho en segundo plano a intervalo fijo.
+    La fuente de conductores disponibles se registra con `driver_source`.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.driver_source: Optional[Callable[[], list[DriverPosition]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _tick(self) -> Optional[dict]:
+        from app.database.session import AsyncSessionLocal
+
+        if self.driver_source is None:
+            return None
+        drivers = self.driver_source()
+        if not drivers or not len(pending_services_index):
+            return None
+        async with AsyncSessionLocal() as db:
+            return await run_dispatch_round(db, drivers)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                result = await self._tick()
+                if result and result["assignments"]:
+                    logger.info(
+                        "Ronda de despacho: %d asignaciones (%s, %.1f ms)",
+                        len(result["assignments"]), result["solver"], result["elapsed_ms"],
+                    )
+            except Exception:
+                logger.exception("Error en la ronda de despacho")
+
+
+dispatcher = Dispatcher(settings.DISPATCH_INTERVAL_SECONDS)
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.responses import model_response
+
+conditional_responses = Counter("http_conditional_responses_total", "Respuestas de GET condicionales", ["result"])
+
+# Columnas, además de id y updated_at, que entran en la versión de cada tipo.
+# En SQLite updated_at tiene resolución de segundos: estas columnas (baratas,
+# ya cargadas) evitan que dos cambios en el mismo segundo compartan ETag.
+_VERSION_FIELDS = {
+    "service": ("status_id", "driver_id"),
+    "user": ("email", "name", "role_id"),
+}
+
+
+def entity_etag(kind: str, entity) -> str:
+    """
+    ETag fuerte derivado de id + updated_at (o created_at si nunca se actualizó).
+    """
+    changed = entity.updated_at or entity.created_at
+    parts = [kind, str(entity.id), changed.isoformat() if changed else ""]
+    parts.extend(str(getattr(entity, field)) for field in _VERSION_FIELDS[kind])
+    return '"' + hashlib.blake2b(":".join(parts).encode(), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Comparación débil de If-None-Match (RFC 9110): admite listas, `*` y `W/`.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+# --------------------------------------------------------------------
+# 🏷️ Caché de versiones
+# --------------------------------------------------------------------
+class VersionCache:
+    """
+    (tipo, id) → ETag vigente, escrita por las operaciones que modifican la
+    fila y por las lecturas completas. Permite responder 304 sin consultar
+    la BD. Las entradas caducan a los `ttl` segundos: las escrituras hechas
+    en otro worker solo se ven al caducar la entrada local.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, int], tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, kind: str, entity_id: int) -> Optional[str]:
+        key = (kind, entity_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            etag, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return etag
+
+    def put(self, kind: str, entity, overwrite: bool = True) -> str:
+        """
+        Registra la versión de la fila. Las lecturas pasan `overwrite=False`:
+        una réplica atrasada no debe pisar la versión escrita por este worker.
+        """
+        etag = entity_etag(kind, entity)
+        if self.max_entries <= 0:
+            return etag
+        key = (kind, entity.id)
+        now = time.monotonic()
+        with self._lock:
+            current = self._entries.get(key)
+            if not overwrite and current is not None and current[1] > now:
+                return etag
+            self._entries[key] = (etag, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def discard(self, kind: str, entity_id: int) -> None:
+        with self._lock:
+            self._entries.pop((kind, entity_id), None)
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def cached_not_modified(request: Request, kind: str, entity_id: int) -> Optional[Response]:
+    """
+    304 desde la caché de versiones, sin tocar la BD; None si hay que consultar.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    etag = entity_versions.get(kind, entity_id)
+    if etag is not None and etag_matches(if_none_match, etag):
+        conditional_responses.labels("not_modified_cache").inc()
+        return _not_modified(etag)
+    return None
+
+
+def conditional_response(request: Request, kind: str, entity, model_type) -> Response:
+    """
+    Respuesta de un GET de detalle ya consultado: 304 sin serializar si el
+    cliente tiene la versión vigente, o el cuerpo con su ETag.
+    """
+    etag = entity_versions.put(kind, entity, overwrite=False)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        conditional_responses.labels("not_modified_db").inc()
+        return _not_modified(etag)
+    conditional_responses.labels("full").inc()
+    return model_response(model_type, entity, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+entity_versions = VersionCache(settings.ETAG_CACHE_MAX_ENTRIES, settings.ETAG_CACHE_TTL_SECONDS)
@@ -0,0 +1,159 @@
+import asyncio
+import json
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.core.responses import json_default
+
+events_subscribers = Gauge("events_subscribers", "Suscripciones activas al broker de eventos")
+events_published = Counter("events_published_total", "Eventos publicados en el broker")
+events_dropped = Counter("events_dropped_total", "Eventos descartados por suscriptores lentos")
+events_evicted = Counter("events_evicted_total", "Suscriptores desconectados por no consumir eventos")
+
+
+class Subscription:
+    """
+    Cola acotada de un suscriptor. Si se llena, se descarta el evento más
+    antiguo (el cliente conserva el estado más reciente); si acumula demasiados
+    descartes se cierra la suscripción para liberar recursos.
+    """
+    __slots__ = ("topics", "queue", "dropped", "closed")
+
+    def __init__(self, topics: tuple[str, ...], max_queue: int):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, message: str, max_dropped: int) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+            return
+        except asyncio.QueueFull:
+            pass
+        self.queue.get_nowait()
+        self.queue.put_nowait(message)
+        self.dropped += 1
+        events_dropped.inc()
+        if self.dropped > max_dropped:
+            self.close()
+            events_evicted.inc()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # None indica al consumidor que debe terminar
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[str]:
+        return await self.queue.get()
+
+
+# --------------------------------------------------------------------
+# 📣 Broker pub/sub en proceso
+# --------------------------------------------------------------------
+class EventBroker:
+    """
+    Reparte eventos por tópico (`service:<id>`, `user:<id>`) a los suscriptores
+    del proceso. Cada evento se serializa una sola vez como mensaje SSE y se
+    encola sin bloquear en todas las suscripciones interesadas.
+    Solo debe usarse desde el event loop.
+    """
+
+    def __init__(self, max_queue: int, max_dropped: int):
+        self.max_queue = max_queue
+        self.max_dropped = max_dropped
+        self._topics: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(tuple(topics), self.max_queue)
+        for topic in subscription.topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        events_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+        subscription.closed = True
+        events_subscribers.dec()
+
+    def publish(self, topics: Iterable[str], event: str, data: dict) -> int:
+        """
+        Publica un evento en los tópicos indicados. Devuelve a cuántos
+        suscriptores se entregó.
+        """
+        targets = set()
+        for topic in topics:
+            subscribers = self._topics.get(topic)
+            if subscribers:
+                targets.update(subscribers)
+        events_published.inc()
+        if not targets:
+            return 0
+        message = format_sse(event, data)
+        for subscription in targets:
+            subscription.offer(message, self.max_dropped)
+        return len(targets)
+
+
+async def sse_stream(request, subscription: Subscription, initial: Optional[str] = None):
+    """
+    Generador de la respuesta SSE: envía los mensajes de la suscripción y un
+    comentario keep-alive periódico; al desconectarse el cliente (o al ser
+    expulsado por lento) libera la suscripción.
+    """
+    try:
+        yield initial or ": conectado\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if message is None:
+                break
+            yield message
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=json_default, separators=(',', ':'))}\n\n"
+
+
+def service_event_payload(service) -> dict:
+    return {
+        "id": service.id,
+        "client_id": service.client_id,
+        "driver_id": service.driver_id,
+        "status": service.status_name,
+        "updated_at": service.updated_at or service.created_at,
+    }
+
+
+def publish_service_event(event: str, service) -> int:
+    """
+    Publica el estado de un servicio a sus suscriptores, a su cliente y a su conductor.
+    """
+    topics = [f"service:{service.id}", f"user:{service.client_id}"]
+    if service.driver_id is not None:
+        topics.append(f"user:{service.driver_id}")
+    return broker.publish(topics, event, service_event_payload(service))
+
+
+broker = EventBroker(settings.EVENTS_SUBSCRIBER_QUEUE_SIZE, settings.EVENTS_MAX_DROPPED)
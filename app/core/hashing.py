@@ -0,0 +1,87 @@
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
+
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5, 5.0)
+
+hash_queue_depth = Gauge("password_hash_queue_depth", "Operaciones bcrypt esperando un worker libre")
+hash_inflight = Gauge("password_hash_inflight", "Operaciones bcrypt ejecutándose")
+hash_rejected = Counter("password_hash_rejected_total", "Operaciones bcrypt rechazadas por saturación")
+hash_latency = Histogram("password_hash_seconds", "Duración de cada operación bcrypt", ("operation",), HASH_BUCKETS)
+hash_wait = Histogram("password_hash_wait_seconds", "Tiempo en cola antes de ejecutar bcrypt", buckets=HASH_BUCKETS)
+
+
+class HashPoolSaturated(Exception):
+    """
+    La cola del pool de hashing está llena.
+    """
+
+
+# --------------------------------------------------------------------
+# 🔐 Pool dedicado para bcrypt
+# --------------------------------------------------------------------
+class PasswordHashPool:
+    """
+    Ejecuta bcrypt en un pool de hilos propio (bcrypt libera el GIL) para que
+    el event loop nunca quede bloqueado. Admite como máximo `workers` operaciones
+    en ejecución más `max_queue` en espera; por encima de eso rechaza de
+    inmediato con `HashPoolSaturated` en lugar de acumular backlog.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        # Solo se modifica desde el event loop, no necesita lock
+        self._pending = 0
+        # Media móvil de la duración de bcrypt, para estimar el Retry-After
+        self._avg_seconds = 0.1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _publish_depth(self) -> None:
+        hash_inflight.set(min(self._pending, self.workers))
+        hash_queue_depth.set(max(0, self._pending - self.workers))
+
+    def _timed(self, operation: str, submitted: float, fn: Callable, args: tuple):
+        started = time.perf_counter()
+        hash_wait.observe(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            hash_latency.labels(operation).observe(elapsed)
+            self._avg_seconds += 0.1 * (elapsed - self._avg_seconds)
+
+    def retry_after(self) -> int:
+        """
+        Segundos estimados hasta vaciar la cola actual (mínimo 1).
+        """
+        return max(1, math.ceil(self._pending / self.workers * self._avg_seconds))
+
+    async def run(self, operation: str, fn: Callable, *args):
+        if self._pending >= self.workers + self.max_queue:
+            hash_rejected.inc()
+            raise HashPoolSaturated()
+        self._pending += 1
+        self._publish_depth()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, operation, time.perf_counter(), fn, args)
+        finally:
+            self._pending -= 1
+            self._publish_depth()
+
+
+password_hash_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,52 @@
+import time
+
+from app.core.metrics import Gauge, Histogram
+
+http_requests_in_flight = Gauge("http_requests_in_flight", "Peticiones HTTP en curso")
+http_request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta y código de estado (su _count es el total de peticiones)",
+    ["method", "route", "status"],
+)
+
+
+# --------------------------------------------------------------------
+# ⏱️ Middleware de métricas HTTP
+# --------------------------------------------------------------------
+class HTTPMetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición por plantilla de ruta
+    (`/services/{service_id}`, no la URL concreta) y código de estado.
+    Las series ya resueltas se guardan en un diccionario local para que el
+    coste por petición sea una búsqueda y un `observe`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._series: dict[tuple, object] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        http_requests_in_flight.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            key = (scope["method"], getattr(route, "path", None) or "sin_ruta", status_code)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = http_request_latency.labels(*key)
+            series.observe(time.perf_counter() - started)
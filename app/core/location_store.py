@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.dispatch import DriverPosition
+
+logger = logging.getLogger(__name__)
+
+_NAN = float("nan")
+
+
+# --------------------------------------------------------------------
+# 📍 Última posición conocida de cada conductor
+# --------------------------------------------------------------------
+class DriverLocationStore:
+    """
+    Columnas compactas (array.array) con la última posición de cada conductor.
+    Cada conductor ocupa un slot fijo; actualizar una posición es O(1) y solo
+    marca el slot como sucio. Los slots sucios se persisten en lote cada
+    `flush_interval` segundos con un upsert en lote (executemany) por bloque.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._slot_of: dict[int, int] = {}
+        self._driver_id = array("q")
+        self._lat = array("d")
+        self._lng = array("d")
+        self._heading = array("d")
+        self._speed = array("d")
+        self._ts = array("d")
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def _slot(self, driver_id: int) -> int:
+        slot = self._slot_of.get(driver_id)
+        if slot is None:
+            slot = len(self._driver_id)
+            self._slot_of[driver_id] = slot
+            self._driver_id.append(driver_id)
+            for column in (self._lat, self._lng, self._heading, self._speed):
+                column.append(_NAN)
+            self._ts.append(0.0)
+        return slot
+
+    def update(self, driver_id: int, lat: float, lng: float, heading: Optional[float] = None,
+               speed_kmh: Optional[float] = None, ts: Optional[float] = None, dirty: bool = True) -> bool:
+        """
+        Registra una posición. Devuelve False si es más antigua que la guardada.
+        Un `ts` en el futuro se ajusta a la hora actual: si no, bloquearía las
+        posiciones reales siguientes y mantendría al conductor como disponible.
+        """
+        now = time.time()
+        if ts is None or ts > now:
+            ts = now
+        with self._lock:
+            slot = self._slot(driver_id)
+            if ts < self._ts[slot]:
+                return False
+            self._lat[slot] = lat
+            self._lng[slot] = lng
+            self._heading[slot] = _NAN if heading is None else heading
+            self._speed[slot] = _NAN if speed_kmh is None else speed_kmh
+            self._ts[slot] = ts
+            if dirty:
+                self._dirty.add(slot)
+        return True
+
+    def _row(self, slot: int) -> dict:
+        heading = self._heading[slot]
+        speed = self._speed[slot]
+        return {
+            "driver_id": self._driver_id[slot],
+            "lat": self._lat[slot],
+            "lng": self._lng[slot],
+            "heading": None if heading != heading else heading,
+            "speed_kmh": None if speed != speed else speed,
+            "recorded_at": datetime.fromtimestamp(self._ts[slot], tz=timezone.utc),
+        }
+
+    def get_many(self, driver_ids: Iterable[int]) -> list[dict]:
+        """
+        Última posición conocida de los conductores pedidos (omite los desconocidos).
+        """
+        with self._lock:
+            return [self._row(slot) for slot in (self._slot_of.get(d) for d in driver_ids) if slot is not None]
+
+    def fresh_positions(self, max_age_seconds: float) -> list[DriverPosition]:
+        """
+        Conductores con una posición más reciente que `max_age_seconds`.
+        """
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            n = len(self._driver_id)
+            if not n:
+                return []
+            ts = np.frombuffer(self._ts, dtype=np.float64, count=n)
+            fresh = np.flatnonzero(ts >= cutoff)
+            ids = np.frombuffer(self._driver_id, dtype=np.int64, count=n)[fresh]
+            lat = np.frombuffer(self._lat, dtype=np.float64, count=n)[fresh]
+            lng = np.frombuffer(self._lng, dtype=np.float64, count=n)[fresh]
+        return [DriverPosition(int(d), float(a), float(b)) for d, a, b in zip(ids, lat, lng)]
+
+    def drain_dirty(self) -> list[dict]:
+        """
+        Extrae las filas pendientes de persistir y limpia las marcas.
+        """
+        with self._lock:
+            slots, self._dirty = self._dirty, set()
+            return [self._row(slot) for slot in slots]
+
+    # ----------------------------------------------------------------
+    # Persistencia
+    # ----------------------------------------------------------------
+    def flush(self, db: Session) -> int:
+        """
+        Persiste en lote las posiciones modificadas desde el último flush.
+        """
+        rows = self.drain_dirty()
+        if not rows:
+            return 0
+        stmt = _upsert_statement(db)
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                db.execute(stmt, rows[start:start + self.batch_size])
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Volver a marcar las filas para el próximo intento
+            with self._lock:
+                self._dirty.update(self._slot_of[row["driver_id"]] for row in rows)
+            raise
+        return len(rows)
+
+    def load(self, db: Session) -> None:
+        """
+        Carga las últimas posiciones persistidas (sin marcarlas como sucias).
+        """
+        from app.database.models import DriverLocation
+
+        for loc in db.query(DriverLocation).all():
+            recorded_at = loc.recorded_at
+            if recorded_at.tzinfo is None:
+                recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+            self.update(loc.driver_id, loc.lat, loc.lng, loc.heading, loc.speed_kmh,
+                        recorded_at.timestamp(), dirty=False)
+
+    def _flush_once(self) -> int:
+        from app.database.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return self.flush(db)
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        if self.flush_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Último flush para no perder posiciones al apagar
+        await asyncio.to_thread(self._flush_once)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self._flush_once)
+            except Exception:
+                logger.exception("Error persistiendo ubicaciones de conductores")
+
+
+def _upsert_statement(db: Session):
+    from app.database.models import DriverLocation
+
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(DriverLocation)
+    return stmt.on_conflict_do_update(
+        index_elements=[DriverLocation.driver_id],
+        set_={
+            "lat": stmt.excluded.lat,
+            "lng": stmt.excluded.lng,
+            "heading": stmt.excluded.heading,
+            "speed_kmh": stmt.excluded.speed_kmh,
+            "recorded_at": stmt.excluded.recorded_at,
+            "updated_at": stmt.excluded.recorded_at,
+        },
+    )
+
+
+driver_locations = DriverLocationStore(settings.LOCATION_FLUSH_INTERVAL_SECONDS, settings.LOCATION_FLUSH_BATCH_SIZE)
@@ -0,0 +1,74 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Valores que el código espera encontrar en las tablas de catálogo
+DEFAULT_ROLES = ("client", "driver", "admin")
+DEFAULT_SERVICE_STATUSES = ("pending", "accepted", "completed", "cancelled")
+
+
+class LookupTable:
+    """
+    Mapeo bidireccional nombre ↔ id de una tabla de catálogo.
+    Los diccionarios se reemplazan completos al recargar, así que las
+    lecturas concurrentes nunca ven un estado a medias.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self._by_name: dict[str, int] = {}
+        self._by_id: dict[int, str] = {}
+
+    def id_of(self, name: str) -> int:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise ValueError(f"{self.label} desconocido: {name}")
+
+    def name_of(self, id_: Optional[int]) -> Optional[str]:
+        return self._by_id.get(id_)
+
+    def names(self) -> list[str]:
+        return list(self._by_name)
+
+    def replace(self, rows) -> None:
+        by_name = {name: id_ for id_, name in rows}
+        self._by_id = {id_: name for name, id_ in by_name.items()}
+        self._by_name = by_name
+
+
+# --------------------------------------------------------------------
+# 📚 Registro en memoria de roles y estados de servicio
+# --------------------------------------------------------------------
+class LookupRegistry:
+    """
+    Roles y estados de servicio cargados una vez al arrancar, para que
+    ninguna ruta tenga que consultar esas tablas.
+    """
+
+    def __init__(self):
+        self.roles = LookupTable("Rol")
+        self.statuses = LookupTable("Estado de servicio")
+
+    def load(self, db: Session) -> None:
+        """
+        Carga (o recarga) los catálogos con una sesión síncrona.
+        """
+        from app.database.models import Role, ServiceStatus
+
+        self.roles.replace(db.execute(select(Role.id, Role.name)).all())
+        self.statuses.replace(db.execute(select(ServiceStatus.id, ServiceStatus.name)).all())
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """
+        Recarga los catálogos con una sesión asíncrona (p. ej. tras editarlos).
+        """
+        from app.database.models import Role, ServiceStatus
+
+        self.roles.replace((await db.execute(select(Role.id, Role.name))).all())
+        self.statuses.replace((await db.execute(select(ServiceStatus.id, ServiceStatus.name))).all())
+
+
+lookups = LookupRegistry()
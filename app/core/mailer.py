@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import smtplib
+from email.message import EmailMessage
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+mails_sent = Counter("mails_sent_total", "Correos enviados por tipo y resultado", ["kind", "result"])
+
+
+# --------------------------------------------------------------------
+# ✉️ Envío de correos (SMTP)
+# --------------------------------------------------------------------
+class Mailer:
+    """
+    Cliente SMTP mínimo. `smtplib` es bloqueante, así que cada envío corre
+    en un hilo con `asyncio.to_thread`.
+    """
+
+    def __init__(self, host: Optional[str], port: int, username: Optional[str], password: Optional[str],
+                 starttls: bool, timeout: float, sender: str):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.sender = sender
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.host)
+
+    def _send(self, message: EmailMessage) -> None:
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            smtp.send_message(message)
+
+    async def send(self, to: str, subject: str, body: str) -> None:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = to
+        message["Subject"] = subject
+        message.set_content(body)
+        await asyncio.to_thread(self._send, message)
+
+
+async def deliver_password_reset(email: str, token: str) -> bool:
+    """
+    Entrega el token de recuperación al usuario. Devuelve False si no hay
+    forma de entregarlo (sin SMTP_HOST) o el envío falla.
+
+    Con PASSWORD_RESET_LOG_TOKENS (solo desarrollo) el token se escribe en
+    el log en lugar de enviarse; fuera de eso, el token nunca va al log.
+    """
+    if settings.PASSWORD_RESET_LOG_TOKENS:
+        logger.warning("Token de recuperación (PASSWORD_RESET_LOG_TOKENS)", extra={"email": email, "token": token})
+        mails_sent.labels("password_reset", "logged").inc()
+        return True
+    if not mailer.enabled:
+        logger.error("Sin SMTP_HOST: no se puede entregar el token de recuperación")
+        mails_sent.labels("password_reset", "unavailable").inc()
+        return False
+
+    link = settings.PASSWORD_RESET_URL.format(token=token) if settings.PASSWORD_RESET_URL else token
+    try:
+        await mailer.send(
+            email,
+            "Recuperación de contraseña",
+            f"Para restablecer tu contraseña usa este enlace (válido 30 minutos):\n\n{link}\n\n"
+            "Si no lo solicitaste, ignora este correo.",
+        )
+    except (smtplib.SMTPException, OSError):
+        logger.exception("Error enviando el correo de recuperación")
+        mails_sent.labels("password_reset", "error").inc()
+        return False
+    mails_sent.labels("password_reset", "sent").inc()
+    return True
+
+
+mailer = Mailer(
+    settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USERNAME,
+    password=settings.SMTP_PASSWORD,
+    starttls=settings.SMTP_STARTTLS,
+    timeout=settings.SMTP_TIMEOUT_SECONDS,
+    sender=settings.MAIL_FROM,
+)
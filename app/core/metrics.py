@@ -0,0 +1,219 @@
+import bisect
+import threading
+from typing import Optional, Sequence
+
+# Buckets por defecto (segundos) para latencias
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Todas las métricas creadas en el proceso
+REGISTRY: list = []
+
+
+# --------------------------------------------------------------------
+# 📈 Métricas en proceso (contadores, gauges e histogramas)
+# --------------------------------------------------------------------
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, "_Metric"] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        """
+        Devuelve (creándola si hace falta) la serie para esos valores de etiqueta.
+        """
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def series(self):
+        """
+        Pares (valores_de_etiqueta, serie). Sin etiquetas devuelve la serie raíz.
+        """
+        if not self.labelnames:
+            return [((), self._root)]
+        return list(self._children.items())
+
+
+class _CounterValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._root = _CounterValue()
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._root.inc(amount)
+
+    @property
+    def value(self) -> float:
+        return self._root.value
+
+
+class _GaugeValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._root = _GaugeValue()
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value: float) -> None:
+        self._root.set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._root.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._root.dec(amount)
+
+    @property
+    def value(self) -> float:
+        return self._root.value
+
+
+class _HistogramValue:
+    """
+    Histograma de buckets fijos: observar es una búsqueda binaria y un
+    incremento en una lista preasignada.
+    """
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: tuple):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Optional[Sequence[float]] = None):
+        self.upper_bounds = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        super().__init__(name, documentation, labelnames)
+        self._root = _HistogramValue(self.upper_bounds)
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._root.observe(value)
+
+    @property
+    def count(self) -> int:
+        return self._root.count
+
+
+# --------------------------------------------------------------------
+# 📤 Exposición en formato de texto de Prometheus
+# --------------------------------------------------------------------
+# Funciones que actualizan gauges justo antes de exponerlas (p. ej. el pool de conexiones)
+COLLECTORS: list = []
+
+
+def register_collector(fn) -> None:
+    COLLECTORS.append(fn)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_prometheus(registry: Optional[list] = None) -> str:
+    """
+    Serializa todas las métricas en el formato de exposición de texto 0.0.4.
+    """
+    for collect in COLLECTORS:
+        collect()
+
+    lines = []
+    for metric in registry if registry is not None else REGISTRY:
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for values, child in metric.series():
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_labels_text(metric.labelnames, values)} {_format_number(child.value)}")
+                continue
+            counts = list(child.counts)
+            cumulative = 0
+            for bound, count in zip(metric.upper_bounds + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{metric.name}_bucket{_labels_text(metric.labelnames, values, le)} {cumulative}")
+            labels = _labels_text(metric.labelnames, values)
+            lines.append(f"{metric.name}_sum{labels} {_format_number(child.sum)}")
+            lines.append(f"{metric.name}_count{labels} {cumulative}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import String, literal, tuple_
+
+from app.core.responses import json_default
+
+
+class InvalidCursorError(ValueError):
+    """
+    El cursor recibido no fue generado por la API o está corrupto.
+    """
+
+
+# --------------------------------------------------------------------
+# 🔖 Paginación por keyset sobre (created_at, id)
+# --------------------------------------------------------------------
+def encode_cursor(created_at: Optional[datetime], id_: int) -> str:
+    """
+    Cursor opaco que apunta a la última fila entregada.
+    """
+    raw = json.dumps([created_at.isoformat() if created_at else None, id_], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[datetime], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id_ = json.loads(raw)
+        return (datetime.fromisoformat(created_at) if created_at else None), int(id_)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Cursor inválido") from e
+
+
+def _bind_created_at(value: datetime, dialect: str):
+    # SQLite guarda CURRENT_TIMESTAMP como texto sin microsegundos; el
+    # parámetro debe tener el mismo formato o la comparación de texto falla
+    if dialect == "sqlite":
+        text = value.strftime("%Y-%m-%d %H:%M:%S")
+        if value.microsecond:
+            text += f".{value.microsecond:06d}"
+        return literal(text, String)
+    return value
+
+
+def keyset_page(stmt, model, cursor: Optional[str], limit: int, dialect: str):
+    """
+    Aplica orden (created_at DESC, id DESC) y el límite a `stmt`, empezando
+    después del cursor. Pide una fila de más para saber si hay otra página.
+    """
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    if cursor:
+        created_at, id_ = decode_cursor(cursor)
+        if created_at is None:
+            stmt = stmt.where(model.created_at.is_(None), model.id < id_)
+        else:
+            stmt = stmt.where(
+                tuple_(model.created_at, model.id) < tuple_(_bind_created_at(created_at, dialect), id_)
+            )
+    return stmt
+
+
+def keyset_key(created_at: Optional[datetime], id_: int) -> tuple:
+    """
+    Clave de orden en Python equivalente a (created_at, id) del keyset, para
+    mezclar páginas de varias fuentes: `reverse=True` da el orden de
+    `keyset_page` (sin fecha al final). Las fechas sin zona (SQLite) son UTC.
+    """
+    if created_at is None:
+        return (False, datetime.min.replace(tzinfo=timezone.utc), id_)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return (True, created_at, id_)
+
+
+def split_page(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """
+    Separa la fila extra pedida por `keyset_page` y genera el cursor siguiente.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+# --------------------------------------------------------------------
+# 📤 Exportación NDJSON
+# --------------------------------------------------------------------
+async def ndjson_stream(batches):
+    """
+    Convierte lotes de diccionarios en NDJSON; cada lote se envía como un
+    solo fragmento para no hacer una escritura por fila.
+    """
+    async for batch in batches:
+        if batch:
+            yield "".join(json.dumps(row, default=json_default, separators=(",", ":")) + "\n" for row in batch)
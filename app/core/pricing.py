@@ -0,0 +1,160 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Sequence
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.utils.geo import haversine_km, haversine_pairwise_km
+
+pricing_cache_hits = Counter("pricing_cache_hits_total", "Cotizaciones servidas desde la caché")
+pricing_cache_misses = Counter("pricing_cache_misses_total", "Cotizaciones calculadas")
+pricing_cache_size = Gauge("pricing_cache_entries", "Entradas en la caché de cotizaciones")
+
+
+class Quote(NamedTuple):
+    distance_km: float
+    duration_min: float
+    price: float
+    currency: str
+
+
+# --------------------------------------------------------------------
+# 🛣️ Modelo de distancia
+# --------------------------------------------------------------------
+class RoadFactorModel:
+    """
+    Distancia por carretera aproximada como haversine × factor y duración a
+    velocidad media constante. Un grafo vial offline puede sustituirlo con
+    una clase que implemente los mismos dos métodos.
+    """
+
+    def __init__(self, road_factor: float, avg_speed_kmh: float):
+        self.road_factor = road_factor
+        self.avg_speed_kmh = avg_speed_kmh
+
+    def route(self, lat1: float, lng1: float, lat2: float, lng2: float) -> tuple[float, float]:
+        """
+        (km, minutos) entre dos puntos.
+        """
+        km = haversine_km(lat1, lng1, lat2, lng2) * self.road_factor
+        return km, km / self.avg_speed_kmh * 60.0
+
+    def routes(self, lat1, lng1, lat2, lng2):
+        """
+        Versión vectorizada de `route` sobre arreglos.
+        """
+        km = haversine_pairwise_km(lat1, lng1, lat2, lng2) * self.road_factor
+        return km, km / self.avg_speed_kmh * 60.0
+
+
+# --------------------------------------------------------------------
+# 💵 Tarifario por tramos de distancia
+# --------------------------------------------------------------------
+class TariffTable:
+    """
+    Tarifa = enganche + Σ (km dentro de cada tramo × precio del tramo),
+    con un mínimo.
+    """
+
+    def __init__(self, base_fare: float, min_fare: float, bands: Sequence[tuple[float, float]]):
+        self.base_fare = base_fare
+        self.min_fare = min_fare
+        self.bands = tuple(sorted((float(upper), float(rate)) for upper, rate in bands))
+
+    def fare(self, km: float) -> float:
+        total, lower = self.base_fare, 0.0
+        for upper, rate in self.bands:
+            if km <= lower:
+                break
+            total += (min(km, upper) - lower) * rate
+            lower = upper
+        return round(max(total, self.min_fare), 2)
+
+    def fares(self, km):
+        import numpy as np
+
+        km = np.asarray(km, dtype=np.float64)
+        total = np.full(km.shape, self.base_fare)
+        lower = 0.0
+        for upper, rate in self.bands:
+            total += np.clip(km - lower, 0.0, upper - lower) * rate
+            lower = upper
+        return np.round(np.maximum(total, self.min_fare), 2)
+
+
+# --------------------------------------------------------------------
+# 🧮 Motor de cotización con caché por celdas
+# --------------------------------------------------------------------
+class QuoteEngine:
+    """
+    Cotiza servicios. Origen y destino se redondean al punto más cercano de
+    una rejilla de `cell_deg` grados y la cotización se calcula desde esos
+    puntos, así que todas las peticiones de la misma pareja de celdas
+    comparten resultado y se sirven desde una LRU acotada.
+    """
+
+    def __init__(self, model: RoadFactorModel, tariff: TariffTable, currency: str, cell_deg: float, max_entries: int):
+        self.model = model
+        self.tariff = tariff
+        self.currency = currency
+        self.cell_deg = cell_deg
+        self.max_entries = max_entries
+        self._cache: OrderedDict[tuple, Quote] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def quote(self, pickup_lat: float, pickup_lng: float, destination_lat: float, destination_lng: float) -> Quote:
+        cell = self.cell_deg
+        key = (round(pickup_lat / cell), round(pickup_lng / cell), round(destination_lat / cell), round(destination_lng / cell))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                pricing_cache_hits.inc()
+                return cached
+
+        pricing_cache_misses.inc()
+        km, minutes = self.model.route(key[0] * cell, key[1] * cell, key[2] * cell, key[3] * cell)
+        result = Quote(round(km, 3), round(minutes, 1), self.tariff.fare(km), self.currency)
+
+        if self.max_entries > 0:
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                pricing_cache_size.set(len(self._cache))
+        return result
+
+    def quote_many(self, pickup_lat, pickup_lng, destination_lat, destination_lng) -> list[Quote]:
+        """
+        Cotiza muchos trayectos de una vez con operaciones vectorizadas
+        (sin pasar por la caché). Misma cuantización que `quote`, así que
+        ambos caminos dan el mismo precio para el mismo trayecto.
+        """
+        import numpy as np
+
+        cell = self.cell_deg
+        coords = [np.round(np.asarray(v, dtype=np.float64) / cell) * cell
+                  for v in (pickup_lat, pickup_lng, destination_lat, destination_lng)]
+        km, minutes = self.model.routes(*coords)
+        prices = self.tariff.fares(km)
+        return [
+            Quote(round(k, 3), round(m, 1), p, self.currency)
+            for k, m, p in zip(km.tolist(), minutes.tolist(), prices.tolist())
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            pricing_cache_size.set(0)
+
+
+quote_engine = QuoteEngine(
+    RoadFactorModel(settings.PRICING_ROAD_FACTOR, settings.PRICING_AVG_SPEED_KMH),
+    TariffTable(settings.PRICING_BASE_FARE, settings.PRICING_MIN_FARE, settings.PRICING_TARIFF_BANDS),
+    settings.PRICING_CURRENCY,
+    settings.PRICING_CACHE_CELL_DEG,
+    settings.PRICING_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, register_collector
+
+logger = logging.getLogger(__name__)
+
+db_queries = Counter("db_queries_total", "Sentencias SQL ejecutadas")
+db_query_latency = Histogram("db_query_duration_seconds", "Duración de cada sentencia SQL")
+request_db_queries = Histogram(
+    "http_request_db_queries", "Sentencias SQL por petición", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+request_db_time = Histogram("http_request_db_seconds", "Tiempo en base de datos por petición", ["route"])
+db_pool_connections = Gauge("db_pool_connections", "Conexiones del pool por estado", ["engine", "state", "worker"])
+query_budget_exceeded = Counter("db_query_budget_exceeded_total", "Peticiones que superaron el presupuesto de consultas", ["route"])
+
+
+class QueryStats:
+    """
+    Contador de sentencias y tiempo en base de datos de la petición actual.
+    """
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+# --------------------------------------------------------------------
+# 🔌 Hooks sobre el motor
+# --------------------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_queries.inc()
+    db_query_latency.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Registra los hooks en un motor síncrono. Para el asíncrono se pasa
+    `async_engine.sync_engine`; las sentencias se ejecutan en el mismo
+    contexto que la corrutina, así que se atribuyen a su petición.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    """
+    Expone el estado del pool de conexiones del motor (tamaño, en uso,
+    libres y overflow) cada vez que se leen las métricas. La etiqueta
+    `worker` (PID) distingue los pools de cada proceso del servidor.
+    """
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return  # p. ej. SingletonThreadPool/StaticPool de SQLite en memoria
+    worker = str(os.getpid())
+
+    def collect():
+        db_pool_connections.labels(name, "size", worker).set(pool.size())
+        db_pool_connections.labels(name, "checked_out", worker).set(pool.checkedout())
+        db_pool_connections.labels(name, "checked_in", worker).set(pool.checkedin())
+        db_pool_connections.labels(name, "overflow", worker).set(max(pool.overflow(), 0))
+
+    register_collector(collect)
+
+
+# --------------------------------------------------------------------
+# 🧮 Middleware: cabeceras, métricas y presupuesto de consultas
+# --------------------------------------------------------------------
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI que mide las consultas de cada petición y las expone en
+    `X-DB-Query-Count` / `X-DB-Time-Ms`. Si la ruta supera
+    QUERY_BUDGET_PER_REQUEST se registra un aviso y, con QUERY_BUDGET_ENFORCE,
+    se responde 500 para que el N+1 se detecte en dev/test.
+    """
+
+    def __init__(self, app, budget: Optional[int] = None, enforce: Optional[bool] = None):
+        self.app = app
+        self.budget = settings.QUERY_BUDGET_PER_REQUEST if budget is None else budget
+        self.enforce = settings.QUERY_BUDGET_ENFORCE if enforce is None else enforce
+        self._series: dict[str, tuple] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        rejected = False
+
+        async def send_wrapper(message):
+            nonlocal rejected
+            if message["type"] == "http.response.start":
+                route = _route_template(scope)
+                series = self._series.get(route)
+                if series is None:
+                    series = self._series[route] = (request_db_queries.labels(route), request_db_time.labels(route))
+                series[0].observe(stats.count)
+                series[1].observe(stats.seconds)
+                if self.budget and stats.count > self.budget:
+                    query_budget_exceeded.labels(route).inc()
+                    logger.warning(
+                        f"{scope['method']} {route} ejecutó {stats.count} consultas "
+                        f"(presupuesto {self.budget})"
+                    )
+                    if self.enforce:
+                        rejected = True
+                        await _send_budget_error(send, route, stats.count, self.budget)
+                        return
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                ]
+            elif rejected:
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+
+def _route_template(scope) -> str:
+    # FastAPI deja la ruta resuelta en el scope; así las etiquetas no crecen con los ids
+    route = scope.get("route")
+    return getattr(route, "path", None) or "sin_ruta"
+
+
+async def _send_budget_error(send, route: str, count: int, budget: int) -> None:
+    body = json.dumps({
+        "detail": f"Presupuesto de consultas excedido en {route}: {count} > {budget}"
+    }).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 500,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-db-query-count", str(count).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
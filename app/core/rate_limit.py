@@ -0,0 +1,120 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+
+rate_limit_allowed = Counter("rate_limit_allowed_total", "Peticiones admitidas por el limitador", ["endpoint"])
+rate_limit_rejected = Counter("rate_limit_rejected_total", "Peticiones rechazadas por el limitador (429)", ["endpoint", "key"])
+rate_limit_buckets = Gauge("rate_limit_buckets", "Buckets en memoria del limitador")
+
+
+# --------------------------------------------------------------------
+# 🪣 Backends de token buckets
+# --------------------------------------------------------------------
+class RateLimitBackend:
+    """
+    Almacén de token buckets. Para varios nodos basta con implementar
+    `take` sobre un almacén compartido (p. ej. un script atómico en Redis).
+    """
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """
+        Consume un token del bucket `key` (recarga `rate` tokens/s, capacidad
+        `burst`). Devuelve 0 si se admite o los segundos hasta el próximo token.
+        """
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Buckets en memoria del proceso, O(1) por operación y acotados a
+    `max_entries` con desalojo LRU. Un bucket desalojado vuelve lleno, lo
+    que solo favorece a claves que llevan tiempo sin pedir nada.
+    Solo debe usarse desde el event loop.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        entry = self._buckets.get(key)
+        if entry is None:
+            tokens = burst
+        else:
+            tokens, updated = entry
+            tokens = min(burst, tokens + (now - updated) * rate)
+            self._buckets.move_to_end(key)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            wait = (1 - tokens) / rate
+
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+        rate_limit_buckets.set(len(self._buckets))
+        return wait
+
+
+# --------------------------------------------------------------------
+# 🚦 Admisión de endpoints con bcrypt
+# --------------------------------------------------------------------
+class AuthRateLimiter:
+    """
+    Limita por IP y por email los endpoints que cuestan un bcrypt (login,
+    registro, cambio de contraseña) antes de tocar el pool de hashing.
+    Responde 429 con `Retry-After`; la saturación global del pool sigue
+    respondiendo 503 (ver `PasswordHashPool`).
+    """
+
+    def __init__(self, backend: RateLimitBackend, ip_per_minute: float, ip_burst: float,
+                 email_per_minute: float, email_burst: float, enabled: bool = True):
+        self.backend = backend
+        self.ip_limit = (ip_per_minute / 60.0, ip_burst)
+        self.email_limit = (email_per_minute / 60.0, email_burst)
+        self.enabled = enabled
+
+    async def check(self, endpoint: str, request: Request, email: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        limits = []
+        if request.client is not None:
+            limits.append(("ip", request.client.host, self.ip_limit))
+        if email:
+            limits.append(("email", email.strip().lower(), self.email_limit))
+
+        retry_after = 0.0
+        for key_type, value, (rate, burst) in limits:
+            wait = await self.backend.take(f"{key_type}:{value}", rate, burst)
+            if wait:
+                rate_limit_rejected.labels(endpoint, key_type).inc()
+                retry_after = max(retry_after, wait)
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Demasiados intentos, intenta de nuevo más tarde.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        rate_limit_allowed.labels(endpoint).inc()
+
+
+auth_rate_limiter = AuthRateLimiter(
+    MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS),
+    ip_per_minute=settings.RATE_LIMIT_IP_PER_MINUTE,
+    ip_burst=settings.RATE_LIMIT_IP_BURST,
+    email_per_minute=settings.RATE_LIMIT_EMAIL_PER_MINUTE,
+    email_burst=settings.RATE_LIMIT_EMAIL_BURST,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
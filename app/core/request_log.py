@@ -0,0 +1,73 @@
+import logging
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.query_stats import current_query_stats
+from app.utils.logger import request_id_var, route_var
+
+access_logger = logging.getLogger("app.access")
+
+
+# --------------------------------------------------------------------
+# 🪪 Middleware de request id y log de acceso
+# --------------------------------------------------------------------
+class RequestLogMiddleware:
+    """
+    Middleware ASGI que asigna un request id (respeta `X-Request-ID` si el
+    cliente lo envía), lo deja en el contexto para todos los logs de la
+    petición, lo devuelve en la respuesta y, con LOG_ACCESS, registra una
+    línea por petición con ruta, estado, latencia y consultas a la BD.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+        route_token = route_var.set(None)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                route_var.set(_route_template(scope))
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if settings.LOG_ACCESS:
+                route = _route_template(scope)
+                route_var.set(route)
+                stats = current_query_stats()
+                access_logger.info(
+                    "%s %s %d", scope["method"], route, status_code,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                        "db_queries": stats.count if stats else None,
+                    },
+                )
+            route_var.reset(route_token)
+            request_id_var.reset(id_token)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "sin_ruta"
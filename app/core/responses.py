@@ -0,0 +1,65 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+from pydantic_core import PydanticSerializationError, to_json, to_jsonable_python
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional, se usa pydantic_core
+    orjson = None
+
+
+# --------------------------------------------------------------------
+# ⚡ Serialización JSON rápida
+# --------------------------------------------------------------------
+def json_default(value: Any) -> Any:
+    """
+    `default` común para serializar JSON fuera de los modelos (respuestas,
+    exportación NDJSON, eventos SSE y archivo de servicios): el mismo
+    criterio de pydantic para fechas (ISO 8601), Decimal, UUID, enums...;
+    lo que pydantic no conoce se escribe con `str`.
+    """
+    try:
+        return to_jsonable_python(value)
+    except PydanticSerializationError:
+        return str(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa con orjson (o con pydantic_core si no está
+    instalado) en lugar de `json.dumps`. Misma salida: UTF-8 sin escapar,
+    fechas en ISO 8601.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+        return to_json(content)
+
+
+# Clase de respuesta por defecto de los routers
+ResponseClass = FastJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
+
+
+@lru_cache(maxsize=None)
+def _adapter(model_type) -> TypeAdapter:
+    return TypeAdapter(model_type)
+
+
+def model_response(model_type, value: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """
+    Valida `value` (p. ej. objetos ORM) contra `model_type` y lo serializa
+    directamente a bytes con el TypeAdapter, sin el paso intermedio a
+    diccionarios + `json.dumps` que hace FastAPI con `response_model`.
+    El endpoint conserva su `response_model` para la documentación.
+    """
+    adapter = _adapter(model_type)
+    validated = adapter.validate_python(value, from_attributes=True)
+    if settings.FAST_JSON_RESPONSES:
+        return Response(adapter.dump_json(validated), status_code=status_code, headers=headers, media_type="application/json")
+    return JSONResponse(adapter.dump_python(validated, mode="json"), status_code=status_code, headers=headers)
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+revocation_checks = Counter("revocation_checks_total", "Consultas al conjunto de sesiones revocadas", ["result"])
+revocation_entries = Gauge("revocation_entries", "Sesiones revocadas en el filtro de Bloom")
+
+
+# --------------------------------------------------------------------
+# 🌸 Filtro de Bloom
+# --------------------------------------------------------------------
+class BloomFilter:
+    """
+    Conjunto probabilístico sin falsos negativos: `key in filtro` es False
+    con certeza si nunca se añadió, y True con probabilidad `fp_rate` si no.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Doble hashing (Kirsch-Mitzenmacher) sobre un único digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+# --------------------------------------------------------------------
+# 🚫 Sesiones revocadas
+# --------------------------------------------------------------------
+class RevocationSet:
+    """
+    Familias de refresh tokens revocadas (logout, reutilización detectada,
+    cambio de contraseña). Los access tokens llevan su familia en `sid`;
+    `get_current_user` la consulta aquí en O(1).
+
+    Solo hace falta recordar las revocaciones de los últimos
+    ACCESS_TOKEN_EXPIRE_MINUTES: los access tokens anteriores ya expiraron.
+    El filtro se reconstruye periódicamente desde la BD (así ve lo revocado
+    por otros workers) y un positivo se confirma en la BD antes de rechazar.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float, window_seconds: float, sync_interval: float):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.window_seconds = window_seconds
+        self.sync_interval = sync_interval
+        self._filter = BloomFilter(capacity, fp_rate)
+        # Revocaciones locales recientes, se conservan al reconstruir por si la
+        # consulta de sincronización empezó antes de su commit
+        self._recent: dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, family_ids: Iterable[str]) -> None:
+        now = time.monotonic()
+        for family_id in family_ids:
+            self._filter.add(family_id)
+            self._recent[family_id] = now
+        revocation_entries.set(self._filter.count)
+
+    async def is_revoked(self, family_id: str) -> bool:
+        if family_id not in self._filter:
+            revocation_checks.labels("clear").inc()
+            return False
+        from app.database.models import RefreshToken
+        from app.database.session import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            revoked = await db.scalar(
+                select(RefreshToken.id)
+                .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_not(None))
+                .limit(1)
+            )
+        revocation_checks.labels("revoked" if revoked else "false_positive").inc()
+        return revoked is not None
+
+    def _since(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.window_seconds)
+
+    def _rebuild(self, family_ids: Iterable[str]) -> None:
+        fresh = BloomFilter(self.capacity, self.fp_rate)
+        for family_id in family_ids:
+            fresh.add(family_id)
+        cutoff = time.monotonic() - 2 * self.sync_interval
+        self._recent = {key: added for key, added in self._recent.items() if added > cutoff}
+        for family_id in self._recent:
+            fresh.add(family_id)
+        self._filter = fresh
+        revocation_entries.set(fresh.count)
+
+    def load(self, db: Session) -> None:
+        from app.database.models import RefreshToken
+
+        rows = db.execute(
+            select(RefreshToken.family_id).where(RefreshToken.revoked_at > self._since()).distinct()
+        ).scalars()
+        self._rebuild(rows)
+
+    async def sync(self) -> None:
+        from app.database.models import RefreshToken
+        from app.database.session import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(RefreshToken.family_id).where(RefreshToken.revoked_at > self._since()).distinct()
+            )).scalars().all()
+        self._rebuild(rows)
+
+    def start(self) -> None:
+        if self.sync_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Error sincronizando sesiones revocadas")
+
+
+revoked_sessions = RevocationSet(
+    settings.REVOCATION_BLOOM_CAPACITY,
+    settings.REVOCATION_BLOOM_FP_RATE,
+    window_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+)
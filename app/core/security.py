@@ -1,10 +1,16 @@
 from passlib.context import CryptContext
 from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import datetime, timedelta
-from fastapi import Depends, HTTPException, Security
+from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
+from app.core.hashing import password_hash_pool, HashPoolSaturated
+from app.core.token_cache import VerifiedTokenCache
+from app.core.revocation import revoked_sessions
+import hashlib
+import hmac
 import logging
+import secrets
 
 # Configuración del contexto para hashear contraseñas
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -12,6 +18,9 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # Middleware para obtener el token
 security = HTTPBearer()
 
+# Caché de tokens ya verificados (evita re-verificar la firma en cada petición)
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
 logger = logging.getLogger(__name__)
 
 def log_failed_login_attempt(email: str):
@@ -49,6 +58,39 @@ def get_password_hash(password: str) -> str:
         raise HTTPException(status_code=500, detail="Error al generar el hash de la contraseña.")
 
 
+# --------------------------------------------------------------------
+# ⏳ Versiones asíncronas (bcrypt fuera del event loop)
+# --------------------------------------------------------------------
+def _hashing_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Servicio saturado, intenta de nuevo en unos segundos.",
+        headers={"Retry-After": str(password_hash_pool.retry_after())},
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Igual que `verify_password`, pero ejecutada en el pool de hashing.
+    Responde 503 si el pool está saturado.
+    """
+    try:
+        return await password_hash_pool.run("verify", verify_password, plain_password, hashed_password)
+    except HashPoolSaturated:
+        raise _hashing_unavailable()
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Igual que `get_password_hash`, pero ejecutada en el pool de hashing.
+    Responde 503 si el pool está saturado.
+    """
+    try:
+        return await password_hash_pool.run("hash", get_password_hash, password)
+    except HashPoolSaturated:
+        raise _hashing_unavailable()
+
+
 # --------------------------------------------------------------------
 # 🧾 Función para crear un token JWT
 # --------------------------------------------------------------------
@@ -67,6 +109,57 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+# --------------------------------------------------------------------
+# 🔑 Tokens de recuperación de contraseña
+# --------------------------------------------------------------------
+PASSWORD_RESET_PURPOSE = "password_reset"
+
+
+def create_password_reset_token(user_id: int, email: str, expires_delta: timedelta = timedelta(minutes=30)) -> str:
+    """
+    Crea el token de recuperación de contraseña. Lleva sus propios claims
+    (`purpose`, sin rol): no sirve como access token, y un access token
+    no sirve para restablecer la contraseña.
+    """
+    return jwt.encode({
+        "sub": email,
+        "id": int(user_id),
+        "purpose": PASSWORD_RESET_PURPOSE,
+        "exp": datetime.utcnow() + expires_delta,
+    }, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_password_reset_token(token: str) -> str:
+    """
+    Verifica un token de recuperación y devuelve el correo del usuario.
+    Responde 401 si es inválido, ha expirado o no es de recuperación.
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    email = payload.get("sub")
+    if payload.get("purpose") != PASSWORD_RESET_PURPOSE or not email:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return email
+
+
+# --------------------------------------------------------------------
+# 🔁 Refresh tokens (opacos, guardados como HMAC, no bcrypt)
+# --------------------------------------------------------------------
+def new_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    HMAC-SHA256 con SECRET_KEY: el token ya tiene 256 bits aleatorios, así
+    que no necesita un hash lento; sin la clave, un volcado de la tabla no
+    permite usar los tokens.
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
 # --------------------------------------------------------------------
 # 🔍 Función para decodificar/verificar un token JWT
 # --------------------------------------------------------------------
@@ -87,9 +180,9 @@ def decode_access_token(token: str) -> dict:
 # --------------------------------------------------------------------
 # 👤 Obtener el usuario actual desde el token JWT
 # --------------------------------------------------------------------
-def get_current_user(token: HTTPAuthorizationCredentials = Security(security)) -> dict:
+async def get_current_user(token: HTTPAuthorizationCredentials = Security(security)) -> dict:
     try:
-        payload = decode_access_token(token.credentials)
+        payload = token_cache.get_or_verify(token.credentials, decode_access_token)
         user_id = payload.get("id")
         email = payload.get("sub")
         role = payload.get("role")
@@ -97,6 +190,11 @@ def get_current_user(token: HTTPAuthorizationCredentials = Security(security)) -
         if not all([email, user_id, role]):
             raise HTTPException(status_code=401, detail="Token inválido o incompleto.")
 
+        # Sesión revocada (logout, refresh token reutilizado, cambio de contraseña)
+        session_id = payload.get("sid")
+        if session_id and await revoked_sessions.is_revoked(session_id):
+            raise HTTPException(status_code=401, detail="Sesión revocada.")
+
         return {"id": user_id, "email": email, "role": role}
 
     except JWTError:
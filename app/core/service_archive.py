@@ -0,0 +1,266 @@
+import asyncio
+import bisect
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, literal, select
+
+from app.core.config import settings
+from app.core.lookups import lookups
+from app.core.metrics import Counter
+from app.core.pagination import decode_cursor, keyset_key
+from app.core.responses import json_default
+
+logger = logging.getLogger(__name__)
+
+services_archived = Counter("services_archived_total", "Servicios movidos de la tabla caliente al archivo")
+archive_reads = Counter("service_archive_reads_total", "Lecturas del histórico archivado")
+archive_files_read = Counter("service_archive_files_read_total", "Archivos NDJSON descomprimidos al leer el histórico")
+
+# Estados terminales: solo estos servicios salen de la tabla caliente
+FINISHED_STATUSES = ("completed", "cancelled")
+# Directorio de las filas sin created_at: ordena después de todos los meses
+_NO_DATE = "0000-00"
+_DATA_SUFFIX = ".ndjson.gz"
+_USERS_SUFFIX = ".users.json"
+
+
+def _month(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # SQLite: UTC sin zona
+    return value.astimezone(timezone.utc).strftime("%Y-%m")
+
+
+def archive_batch_query(cutoff: datetime, batch_size: int):
+    """
+    Ids del siguiente lote a archivar: terminados anteriores al corte, los
+    más antiguos primero. Los estados van como literales para que la BD
+    pueda usar el índice parcial ix_services_finished_created.
+    """
+    from app.database.models import Service
+
+    finished = [literal(lookups.statuses.id_of(name), literal_execute=True) for name in FINISHED_STATUSES]
+    return (
+        select(Service.id)
+        .where(Service.status_id.in_(finished), Service.created_at < cutoff)
+        .order_by(Service.created_at, Service.id)
+        .limit(batch_size)
+    )
+
+
+# --------------------------------------------------------------------
+# 🗄️ Archivo de servicios terminados
+# --------------------------------------------------------------------
+class ServiceArchive:
+    """
+    Separa `services` en una tabla caliente y un histórico en disco. Los
+    servicios completados o cancelados con más de `after_days` días se
+    exportan a NDJSON comprimido (gzip) y se borran de la tabla; así la
+    tabla y sus índices solo guardan lo abierto o reciente. Desactivado
+    por defecto (`after_days=0`); activo, exige un directorio absoluto.
+
+    Disposición: `<mes de created_at>/<grupo de usuario>/services-*.ndjson.gz`.
+    Cada fila se escribe en el grupo (`user_id % shards`) de su cliente y en
+    el de su conductor, y cada archivo lleva al lado un `.users.json` con los
+    usuarios que contiene. Leer el historial de un usuario solo abre su
+    grupo y descomprime los archivos que de verdad tienen filas suyas.
+
+    El DELETE ... RETURNING es a la vez la lectura y el reclamo de las
+    filas: si varios workers corren el job a la vez, cada fila la borra
+    (y la escribe) solo uno. Los archivos se escriben antes del commit; si
+    el proceso cae entre ambos, las filas siguen en la tabla y pueden
+    quedar también en disco, por eso las lecturas descartan ids repetidos.
+    """
+
+    def __init__(self, directory: str, after_days: int, interval: float, batch_size: int, shards: int):
+        self.directory = directory
+        self.after_days = after_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.shards = max(1, shards)
+        self._task: Optional[asyncio.Task] = None
+
+    def check_directory(self) -> None:
+        """
+        Con el archivo activo, exige un SERVICE_ARCHIVE_DIR absoluto: una ruta
+        relativa acaba en el sistema de archivos efímero del contenedor y el
+        histórico (ya borrado de la tabla) se perdería en el siguiente despliegue.
+        """
+        if self.after_days > 0 and not os.path.isabs(self.directory or ""):
+            raise ValueError(
+                f"SERVICE_ARCHIVE_AFTER_DAYS={self.after_days} requiere SERVICE_ARCHIVE_DIR absoluto "
+                f"en un volumen persistente (actual: {self.directory!r})"
+            )
+
+    def _shard(self, user_id: int) -> str:
+        return f"{user_id % self.shards:02x}"
+
+    # ---------------------------- escritura ----------------------------
+    def _write_files(self, rows: list[dict]) -> list[str]:
+        """
+        Escribe las filas agrupadas por (mes, grupo de usuario), cada grupo en
+        un archivo nuevo con su índice de usuarios. Ambos se escriben como
+        temporal + rename; el índice va después, así que si existe, sus datos
+        están completos.
+        """
+        groups: dict[tuple[str, str], list[dict]] = {}
+        for row in rows:
+            created_at = row["created_at"]
+            month = _month(created_at) if created_at else _NO_DATE
+            users = {user_id for user_id in (row["client_id"], row["driver_id"]) if user_id is not None}
+            for shard in {self._shard(user_id) for user_id in users} or {self._shard(0)}:
+                groups.setdefault((month, shard), []).append(row)
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        paths = []
+        for (month, shard), group_rows in groups.items():
+            folder = os.path.join(self.directory, month, shard)
+            os.makedirs(folder, exist_ok=True)
+            base = os.path.join(folder, f"services-{stamp}-{group_rows[0]['id']}")
+            path = base + _DATA_SUFFIX
+            with gzip.open(path + ".tmp", "wt", encoding="utf-8") as fh:
+                fh.writelines(json.dumps(row, default=json_default, separators=(",", ":")) + "\n" for row in group_rows)
+            os.replace(path + ".tmp", path)
+            users = sorted({user_id for row in group_rows for user_id in (row["client_id"], row["driver_id"])
+                            if user_id is not None and self._shard(user_id) == shard})
+            with open(base + _USERS_SUFFIX + ".tmp", "w", encoding="utf-8") as fh:
+                json.dump(users, fh, separators=(",", ":"))
+            os.replace(base + _USERS_SUFFIX + ".tmp", base + _USERS_SUFFIX)
+            paths.append(path)
+        return paths
+
+    async def archive_once(self, now: Optional[datetime] = None) -> int:
+        """
+        Archiva por lotes los servicios terminados anteriores al corte.
+        Devuelve cuántos se movieron.
+        """
+        if self.after_days <= 0:
+            return 0
+        self.check_directory()
+        from app.core.etag import entity_versions
+        from app.database.models import Service
+        from app.database.session import AsyncSessionLocal
+
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=self.after_days)
+        table = Service.__table__
+        batch = archive_batch_query(cutoff, self.batch_size).scalar_subquery()
+        total = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(delete(table).where(table.c.id.in_(batch)).returning(*table.c))
+                rows = [dict(row) for row in result.mappings()]
+                if not rows:
+                    break
+                await asyncio.to_thread(self._write_files, rows)
+                await db.commit()
+            for row in rows:
+                entity_versions.discard("service", row["id"])
+            services_archived.inc(len(rows))
+            total += len(rows)
+            if len(rows) < self.batch_size:
+                break
+        return total
+
+    # ----------------------------- lectura -----------------------------
+    def _months(self) -> list[str]:
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return sorted((name for name in os.listdir(self.directory) if name[:4].isdigit()), reverse=True)
+
+    def _read_month(self, month: str, user_id: int, before: Optional[tuple]) -> list[dict]:
+        folder = os.path.join(self.directory, month, self._shard(user_id))
+        if not os.path.isdir(folder):
+            return []
+        rows = []
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(_USERS_SUFFIX):
+                continue
+            with open(os.path.join(folder, name), encoding="utf-8") as fh:
+                users = json.load(fh)
+            position = bisect.bisect_left(users, user_id)
+            if position == len(users) or users[position] != user_id:
+                continue
+            archive_files_read.inc()
+            data = os.path.join(folder, name[:-len(_USERS_SUFFIX)] + _DATA_SUFFIX)
+            with gzip.open(data, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    row = json.loads(line)
+                    if row["client_id"] != user_id and row["driver_id"] != user_id:
+                        continue
+                    for field in ("created_at", "updated_at"):
+                        if row[field]:
+                            row[field] = datetime.fromisoformat(row[field])
+                    if before is None or keyset_key(row["created_at"], row["id"]) < before:
+                        rows.append(row)
+        return rows
+
+    def _user_rows(self, user_id: int, limit: int, cursor: Optional[str]) -> list[dict]:
+        before = None
+        if cursor:
+            created_at, id_ = decode_cursor(cursor)
+            before = keyset_key(created_at, id_)
+        rows: dict[int, dict] = {}
+        for month in self._months():
+            # Meses posteriores al cursor ya se entregaron
+            if before is not None and before[0] and month > _month(before[1]):
+                continue
+            for row in self._read_month(month, user_id, before):
+                rows.setdefault(row["id"], row)
+            # Los meses anteriores son todos más antiguos: con una página llena basta
+            if len(rows) > limit:
+                break
+        return sorted(rows.values(), key=lambda row: keyset_key(row["created_at"], row["id"]), reverse=True)[:limit + 1]
+
+    async def user_services(self, user_id: int, limit: int, cursor: Optional[str] = None) -> list:
+        """
+        Servicios archivados de un usuario (cliente o conductor) en orden de
+        keyset, a lo sumo `limit + 1` como `keyset_page`. Son objetos
+        `Service` desligados de la sesión. Lee solo los meses necesarios.
+        """
+        from app.database.models import Service
+
+        archive_reads.inc()
+        rows = await asyncio.to_thread(self._user_rows, user_id, limit, cursor)
+        return [Service(**row) for row in rows]
+
+    # ------------------------------ job -------------------------------
+    def start(self) -> None:
+        self.check_directory()
+        if self.interval > 0 and self.after_days > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            started = time.perf_counter()
+            try:
+                rows = await self.archive_once()
+            except Exception:
+                logger.exception("Error archivando servicios")
+                continue
+            if rows:
+                logger.info("Archivo de servicios completado",
+                            extra={"rows": rows, "seconds": round(time.perf_counter() - started, 3)})
+
+
+service_archive = ServiceArchive(
+    settings.SERVICE_ARCHIVE_DIR,
+    after_days=settings.SERVICE_ARCHIVE_AFTER_DAYS,
+    interval=settings.SERVICE_ARCHIVE_INTERVAL_SECONDS,
+    batch_size=settings.SERVICE_ARCHIVE_BATCH_SIZE,
+    shards=settings.SERVICE_ARCHIVE_USER_SHARDS,
+)
@@ -0,0 +1,145 @@
+import heapq
+import math
+import threading
+from typing import NamedTuple
+
+from sqlalchemy import literal
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.utils.geo import KM_PER_DEG_LAT, haversine_km, km_to_deg_lng
+
+
+class IndexedService(NamedTuple):
+    id: int
+    client_id: int
+    pickup_lat: float
+    pickup_lng: float
+    destination_lat: float
+    destination_lng: float
+
+
+# --------------------------------------------------------------------
+# 🗺️ Índice espacial en memoria de servicios pendientes
+# --------------------------------------------------------------------
+class PendingServiceIndex:
+    """
+    Rejilla de celdas (lat/lng cuantizados) con los servicios pendientes.
+    Una búsqueda solo recorre las celdas que cubren el radio pedido, por lo
+    que su costo depende de la densidad local y no del tamaño de la tabla.
+    """
+
+    def __init__(self, cell_size_deg: float):
+        self.cell_size_deg = cell_size_deg
+        # Columnas de longitud de un anillo completo; el ancho se ajusta para
+        # que dividan los 360° exactos y la columna se pueda tomar módulo anillo
+        self._ring = max(1, math.ceil(360.0 / cell_size_deg))
+        self._lng_cell_deg = 360.0 / self._ring
+        self._cells: dict[tuple[int, int], dict[int, IndexedService]] = {}
+        self._cell_of: dict[int, tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_size_deg), math.floor(((lng + 180.0) % 360.0) / self._lng_cell_deg))
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def add(self, service) -> None:
+        """
+        Inserta (o reubica) un servicio pendiente en el índice.
+        """
+        if service.pickup_lat is None or service.pickup_lng is None:
+            return
+        entry = IndexedService(
+            service.id,
+            service.client_id,
+            service.pickup_lat,
+            service.pickup_lng,
+            service.destination_lat,
+            service.destination_lng,
+        )
+        cell = self._cell(entry.pickup_lat, entry.pickup_lng)
+        with self._lock:
+            self._discard_locked(entry.id)
+            self._cells.setdefault(cell, {})[entry.id] = entry
+            self._cell_of[entry.id] = cell
+
+    def discard(self, service_id: int) -> None:
+        """
+        Elimina un servicio del índice (p. ej. al ser aceptado o cancelado).
+        """
+        with self._lock:
+            self._discard_locked(service_id)
+
+    def _discard_locked(self, service_id: int) -> None:
+        cell = self._cell_of.pop(service_id, None)
+        if cell is None:
+            return
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(service_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def snapshot(self) -> list[IndexedService]:
+        """
+        Copia de todos los servicios pendientes indexados.
+        """
+        with self._lock:
+            return [entry for bucket in self._cells.values() for entry in bucket.values()]
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: int) -> list[tuple[IndexedService, float]]:
+        """
+        Devuelve hasta `limit` servicios dentro de `radius_km`, ordenados por distancia.
+        """
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlng = km_to_deg_lng(radius_km, lat)
+        lat_lo = math.floor(max(lat - dlat, -90.0) / self.cell_size_deg)
+        lat_hi = math.floor(min(lat + dlat, 90.0) / self.cell_size_deg)
+        # Columnas del radio, con vuelta en el antimeridiano y como mucho un
+        # anillo completo (cerca de los polos dlng se dispara)
+        if 2 * dlng >= 360.0:
+            col_lo, col_span = 0, self._ring - 1
+        else:
+            col_lo = math.floor((lng - dlng + 180.0) / self._lng_cell_deg)
+            col_span = min(math.floor((lng + dlng + 180.0) / self._lng_cell_deg) - col_lo, self._ring - 1)
+
+        candidates = []
+        with self._lock:
+            if (lat_hi - lat_lo + 1) * (col_span + 1) <= len(self._cells):
+                for i in range(lat_lo, lat_hi + 1):
+                    for k in range(col_span + 1):
+                        bucket = self._cells.get((i, (col_lo + k) % self._ring))
+                        if bucket:
+                            candidates.extend(bucket.values())
+            else:
+                # La ventana tiene más celdas que las ocupadas: se recorren estas
+                for (i, j), bucket in self._cells.items():
+                    if lat_lo <= i <= lat_hi and (j - col_lo) % self._ring <= col_span:
+                        candidates.extend(bucket.values())
+
+        hits = []
+        for entry in candidates:
+            distance = haversine_km(lat, lng, entry.pickup_lat, entry.pickup_lng)
+            if distance <= radius_km:
+                hits.append((distance, entry.id, entry))
+        return [(entry, distance) for distance, _, entry in heapq.nsmallest(limit, hits)]
+
+    def load(self, db: Session) -> None:
+        """
+        Reconstruye el índice a partir de los servicios pendientes en la base de datos.
+        """
+        from app.core.lookups import lookups
+        from app.database.models import Service
+
+        pending = literal(lookups.statuses.id_of("pending"), literal_execute=True)  # usa el índice parcial
+        rows = db.query(Service).filter(Service.status_id == pending).all()
+        with self._lock:
+            self._cells.clear()
+            self._cell_of.clear()
+        for service in rows:
+            self.add(service)
+
+
+pending_services_index = PendingServiceIndex(settings.NEARBY_CELL_SIZE_DEG)
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from app.core.metrics import Counter, Gauge
+
+token_cache_hits = Counter("token_cache_hits_total", "Tokens resueltos desde la caché de verificación")
+token_cache_misses = Counter("token_cache_misses_total", "Tokens que requirieron verificar la firma")
+token_cache_size = Gauge("token_cache_entries", "Entradas en la caché de tokens verificados")
+
+
+# --------------------------------------------------------------------
+# 🗃️ Caché LRU de tokens ya verificados
+# --------------------------------------------------------------------
+class VerifiedTokenCache:
+    """
+    Caché acotada token → claims. Un token solo se sirve desde la caché
+    mientras no haya alcanzado su `exp`; al expirar se descarta y la siguiente
+    petición vuelve a verificar la firma (y falla como corresponde).
+
+    Solo ahorra la verificación de la firma, que no cambia mientras el token
+    no expire; la revocación (logout, cambio de contraseña) se comprueba
+    después, en `get_current_user`, con la sesión (`sid`) del token.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_verify(self, token: str, verify: Callable[[str], dict]) -> dict:
+        """
+        Devuelve los claims del token, verificándolo solo si no está en caché.
+        """
+        if self.max_entries <= 0:
+            return verify(token)
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                claims, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(token)
+                    token_cache_hits.inc()
+                    return claims
+                del self._entries[token]
+
+        token_cache_misses.inc()
+        claims = verify(token)
+        expires_at = claims.get("exp")
+        if expires_at is None or expires_at <= now:
+            return claims
+
+        with self._lock:
+            self._entries[token] = (claims, float(expires_at))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            token_cache_size.set(len(self._entries))
+        return claims
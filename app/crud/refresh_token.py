@@ -0,0 +1,124 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.revocation import revoked_sessions
+from app.core.security import hash_refresh_token, new_refresh_token
+from app.database.models import RefreshToken, User
+
+
+class RefreshTokenError(ValueError):
+    """
+    El refresh token no existe, expiró o fue revocado.
+    """
+
+
+class RefreshTokenReuseError(RefreshTokenError):
+    """
+    Se presentó un refresh token ya rotado: la familia completa se revoca.
+    """
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite devuelve fechas sin zona horaria
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def new_family_id() -> str:
+    return secrets.token_hex(16)
+
+
+async def issue_refresh_token(db: AsyncSession, user_id: int, family_id: str) -> str:
+    """
+    Crea un refresh token de la familia y devuelve su valor en claro
+    (solo se guarda el HMAC). Hace commit.
+    """
+    token = new_refresh_token()
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    await db.commit()
+    return token
+
+
+async def get_token_family(db: AsyncSession, token: str) -> Optional[str]:
+    """
+    Familia a la que pertenece un refresh token (canjeado o no), o None.
+    """
+    return await db.scalar(select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_refresh_token(token)))
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[User, str, str]:
+    """
+    Canjea un refresh token por uno nuevo de la misma familia y devuelve
+    (usuario, nuevo token, familia). El canje es un UPDATE condicional, así
+    que dos peticiones concurrentes con el mismo token no pueden ganar ambas.
+    Presentar un token ya canjeado revoca la familia (`RefreshTokenReuseError`).
+    """
+    row = (await db.execute(
+        select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+    )).first()
+    if row is None:
+        raise RefreshTokenError("Refresh token inválido")
+    stored, user = row
+    if stored.revoked_at is not None:
+        raise RefreshTokenError("Sesión revocada")
+    if stored.used_at is not None:
+        await revoke_token_family(db, stored.family_id)
+        raise RefreshTokenReuseError("Refresh token reutilizado; sesión revocada")
+    now = datetime.now(timezone.utc)
+    if _aware(stored.expires_at) <= now:
+        raise RefreshTokenError("Refresh token expirado")
+
+    claimed = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.used_at.is_(None), RefreshToken.revoked_at.is_(None))
+        .values(used_at=now)
+    )
+    if claimed.rowcount != 1:
+        await db.rollback()
+        await revoke_token_family(db, stored.family_id)
+        raise RefreshTokenReuseError("Refresh token reutilizado; sesión revocada")
+
+    family_id = stored.family_id
+    new_token = await issue_refresh_token(db, user.id, family_id)
+    return user, new_token, family_id
+
+
+async def revoke_token_family(db: AsyncSession, family_id: str) -> None:
+    """
+    Revoca todos los tokens de la familia y sus access tokens vigentes.
+    """
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+    revoked_sessions.add([family_id])
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int) -> int:
+    """
+    Revoca todas las sesiones de un usuario (p. ej. tras cambiar la contraseña).
+    Devuelve cuántas familias se revocaron.
+    """
+    families = (await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+        .returning(RefreshToken.family_id)
+    )).scalars().all()
+    await db.commit()
+    family_ids = set(families)
+    revoked_sessions.add(family_ids)
+    return len(family_ids)
@@ -1,24 +1,300 @@
-from sqlalchemy.orm import Session
-from app.database.models import Service
+from typing import Optional
 
-def get_services(db: Session):
-    return db.query(Service).all()
+from sqlalchemy import insert, literal, or_, select, union_all, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.database.models import Service, User
+from app.database.session import AsyncReadSessionLocal
+from app.core.config import settings
+from app.core.pagination import keyset_key, keyset_page, split_page
+from app.core.spatial_index import pending_services_index
+from app.core.lookups import lookups
+from app.core.events import publish_service_event
+from app.core.etag import entity_versions
+from app.core.service_archive import service_archive
+from app.schemas.service import ServiceRequestCreate
 
-def update_service_status(db: Session, service_id: int, status: str, driver_id: int):
-    service = db.query(Service).filter(Service.id == service_id).first()
-    if not service:
-        raise ValueError("Servicio no encontrado")
+# Transiciones legales: estado destino → estados de origen permitidos
+SERVICE_TRANSITIONS = {
+    "accepted": ("pending",),
+    "completed": ("accepted",),
+    "cancelled": ("pending", "accepted"),
+}
 
-    if status == "accepted" and service.status != "pending":
-        raise ValueError("El servicio ya fue aceptado")
 
-    service.driver_id = driver_id if status == "accepted" else service.driver_id
-    service.status = status
-    db.commit()
-    db.refresh(service)
+class ServiceStateError(ValueError):
+    """
+    La transición de estado pedida no es válida para el servicio.
+    """
+
+
+class ServiceNotFoundError(ServiceStateError):
+    pass
+
+
+class ServiceForbiddenError(ServiceStateError):
+    pass
+
+
+def _service_filters(status: Optional[str] = None, client_id: Optional[int] = None, driver_id: Optional[int] = None):
+    """
+    Condiciones de filtrado comunes a listados y exportaciones.
+    Un estado desconocido lanza ValueError.
+    """
+    conditions = []
+    if status is not None:
+        # Valor literal (no parámetro) para que PostgreSQL pueda usar el índice parcial de pendientes
+        conditions.append(Service.status_id == literal(lookups.statuses.id_of(status), literal_execute=True))
+    if client_id is not None:
+        conditions.append(Service.client_id == client_id)
+    if driver_id is not None:
+        conditions.append(Service.driver_id == driver_id)
+    return conditions
+
+async def get_services(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    client_id: Optional[int] = None,
+    driver_id: Optional[int] = None,
+):
+    """
+    Página de servicios, del más reciente al más antiguo.
+    Devuelve (servicios, cursor de la página siguiente o None).
+    """
+    stmt = services_page_query(db.bind.dialect.name, limit, cursor, status, client_id, driver_id)
+    result = await db.execute(stmt)
+    return split_page(list(result.scalars().all()), limit)
+
+def services_page_query(dialect: str, limit: int, cursor: Optional[str] = None, status: Optional[str] = None,
+                        client_id: Optional[int] = None, driver_id: Optional[int] = None):
+    stmt = select(Service).where(*_service_filters(status, client_id, driver_id))
+    return keyset_page(stmt, Service, cursor, limit, dialect)
+
+async def iter_services_export(status: Optional[str] = None, client_id: Optional[int] = None, driver_id: Optional[int] = None):
+    """
+    Recorre todos los servicios que cumplen los filtros con un cursor de
+    servidor, en lotes de EXPORT_CHUNK_SIZE filas; la memoria usada no
+    depende del total. Abre su propia sesión porque se consume mientras se
+    envía la respuesta, después de cerrar la sesión de la petición.
+    """
+    conditions = _service_filters(status, client_id, driver_id)
+    stmt = (
+        select(
+            Service.id, Service.client_id, Service.driver_id, Service.status_id,
+            Service.pickup_lat, Service.pickup_lng, Service.destination_lat, Service.destination_lng,
+            Service.created_at, Service.updated_at,
+        )
+        .where(*conditions)
+        .order_by(Service.id)
+        .execution_options(yield_per=settings.EXPORT_CHUNK_SIZE)
+    )
+    # Lectura masiva: va a la réplica si está configurada
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for rows in result.mappings().partitions():
+            batch = []
+            for row in rows:
+                item = dict(row)
+                item["status"] = lookups.statuses.name_of(item.pop("status_id"))
+                batch.append(item)
+            yield batch
+
+async def get_service_by_id(db: AsyncSession, service_id: int):
+    result = await db.execute(
+        select(Service).where(Service.id == service_id)
+    )
+    return result.scalars().first()
+
+async def create_service_request(db: AsyncSession, data: ServiceRequestCreate, created_by: str):
+    """
+    Crea una solicitud de servicio en estado pendiente y la publica. Un
+    único INSERT ... RETURNING trae la fila completa (índice, eventos y
+    respuesta la necesitan), sin el SELECT posterior de `refresh`.
+    """
+    result = await db.execute(
+        insert(Service)
+        .values(
+            client_id=data.client_id,
+            pickup_lat=data.pickup_lat,
+            pickup_lng=data.pickup_lng,
+            destination_lat=data.destination_lat,
+            destination_lng=data.destination_lng,
+            status_id=lookups.statuses.id_of("pending"),
+            created_by=created_by
+        )
+        .returning(Service)
+    )
+    service = result.scalars().one()
+    await db.commit()
+    pending_services_index.add(service)
+    entity_versions.put("service", service)
+    publish_service_event("service.created", service)
     return service
 
-def get_user_services(db: Session, user_id: int):
-    return db.query(Service).filter(
-        (Service.client_id == user_id) | (Service.driver_id == user_id)
-    ).all()
+async def create_service_requests(db: AsyncSession, items: list[tuple[int, ServiceRequestCreate]], created_by: str):
+    """
+    Inserta muchas solicitudes ya validadas. `items` son pares (posición en
+    el lote, datos). Cada bloque de SERVICE_BATCH_CHUNK_SIZE filas va en un
+    INSERT ... RETURNING multi-fila y su propia transacción: si un bloque
+    falla solo se reportan como error sus filas.
+    Devuelve (creados: [(posición, Service)], errores: [(posición, mensaje)]).
+    """
+    created, errors = [], []
+    client_ids = {data.client_id for _, data in items}
+    known = set((await db.execute(select(User.id).where(User.id.in_(client_ids)))).scalars()) if client_ids else set()
+    valid = []
+    for index, data in items:
+        if data.client_id in known:
+            valid.append((index, data))
+        else:
+            errors.append((index, f"client_id {data.client_id} no existe"))
+
+    pending = lookups.statuses.id_of("pending")
+    chunk_size = settings.SERVICE_BATCH_CHUNK_SIZE
+    # En PostgreSQL el orden del RETURNING se garantiza sin coste extra; en
+    # SQLite pedirlo degrada a una sentencia por fila
+    ordered_returning = db.bind.dialect.name == "postgresql"
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        rows = [{**data.model_dump(), "status_id": pending, "created_by": created_by} for _, data in chunk]
+        try:
+            result = await db.execute(
+                insert(Service).returning(Service, sort_by_parameter_order=ordered_returning), rows
+            )
+            services = list(result.scalars().all())
+            if not ordered_returning:
+                # SQLite asigna ids crecientes en el orden de las filas insertadas
+                services.sort(key=lambda service: service.id)
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            message = f"Error al insertar el bloque: {e.__class__.__name__}"
+            errors.extend((index, message) for index, _ in chunk)
+            continue
+        for (index, _), service in zip(chunk, services):
+            pending_services_index.add(service)
+            entity_versions.put("service", service)
+            publish_service_event("service.created", service)
+            created.append((index, service))
+
+    errors.sort()
+    return created, errors
+
+def _actor_conditions(status: str, actor_id: int):
+    """
+    Condiciones sobre quién puede ejecutar cada transición.
+    """
+    if status == "accepted":
+        return [Service.client_id != actor_id]
+    if status == "completed":
+        return [Service.driver_id == actor_id]
+    if status == "cancelled":
+        return [Service.client_id == actor_id]
+    return []
+
+async def _explain_failed_transition(db: AsyncSession, service_id: int, status: str, actor_id: int):
+    """
+    Solo se llama cuando el UPDATE condicional no afectó filas:
+    determina el motivo para devolver un error útil.
+    """
+    row = (await db.execute(
+        select(Service.client_id, Service.driver_id).where(Service.id == service_id)
+    )).first()
+    if row is None:
+        raise ServiceNotFoundError("Servicio no encontrado")
+    if status == "accepted":
+        if row.client_id == actor_id:
+            raise ServiceForbiddenError("No puedes aceptar tu propio servicio")
+        raise ServiceStateError("El servicio ya fue aceptado")
+    if status == "completed":
+        if row.driver_id != actor_id:
+            raise ServiceForbiddenError("Solo el conductor asignado puede completar el servicio")
+        raise ServiceStateError("El servicio no está en curso")
+    if row.client_id != actor_id:
+        raise ServiceForbiddenError("No puedes cancelar un servicio ajeno")
+    raise ServiceStateError("El servicio ya no puede cancelarse")
+
+async def update_service_status(db: AsyncSession, service_id: int, status: str, driver_id: int):
+    """
+    Aplica una transición de estado con un único UPDATE condicional
+    (compare-and-set): solo afecta la fila si su estado actual es uno de los
+    permitidos por SERVICE_TRANSITIONS, así que entre varios conductores que
+    aceptan a la vez exactamente uno gana.
+    """
+    if status not in SERVICE_TRANSITIONS:
+        raise ServiceStateError(f"Transición no soportada: {status}")
+    from_ids = [lookups.statuses.id_of(name) for name in SERVICE_TRANSITIONS[status]]
+
+    values = {"status_id": lookups.statuses.id_of(status)}
+    if status == "accepted":
+        values["driver_id"] = driver_id
+
+    stmt = (
+        update(Service)
+        .where(Service.id == service_id, Service.status_id.in_(from_ids), *_actor_conditions(status, driver_id))
+        .values(**values)
+        .returning(Service)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    service = (await db.execute(stmt)).scalars().first()
+    if service is None:
+        await db.rollback()
+        await _explain_failed_transition(db, service_id, status, driver_id)
+    await db.commit()
+    pending_services_index.discard(service.id)
+    entity_versions.put("service", service)
+    publish_service_event("service.status", service)
+    return service
+
+async def get_assigned_driver_ids(db: AsyncSession, client_id: int, driver_ids: list[int]) -> set[int]:
+    """
+    De `driver_ids`, los conductores asignados a algún servicio en curso
+    (aceptado) del cliente.
+    """
+    accepted = literal(lookups.statuses.id_of("accepted"), literal_execute=True)
+    result = await db.execute(
+        select(Service.driver_id)
+        .where(Service.client_id == client_id, Service.status_id == accepted, Service.driver_id.in_(driver_ids))
+        .distinct()
+    )
+    return set(result.scalars().all())
+
+async def get_user_services(db: AsyncSession, user_id: int, limit: int, cursor: Optional[str] = None,
+                            include_archived: bool = False):
+    """
+    Página de servicios en los que participa el usuario (cliente o conductor).
+    Con `include_archived` mezcla la página de la tabla caliente con la del
+    histórico archivado en el mismo orden de keyset; el cursor vale para ambos.
+    """
+    stmt = user_services_page_query(db.bind.dialect.name, user_id, limit, cursor)
+    result = await db.execute(stmt)
+    services = list(result.scalars().all())
+    if include_archived:
+        hot_ids = {service.id for service in services}
+        archived = await service_archive.user_services(user_id, limit, cursor)
+        services.extend(service for service in archived if service.id not in hot_ids)
+        services.sort(key=lambda service: keyset_key(service.created_at, service.id), reverse=True)
+        services = services[:limit + 1]
+    return split_page(services, limit)
+
+def user_services_page_query(dialect: str, user_id: int, limit: int, cursor: Optional[str] = None):
+    """
+    `client_id = ? OR driver_id = ?` obliga a recorrer la tabla; en su lugar
+    cada rama usa su índice (client_id|driver_id, created_at, id) y lee a lo
+    sumo una página, y el UNION ALL se ordena y recorta al final. La segunda
+    rama excluye los servicios del propio cliente para no duplicarlos.
+    """
+    as_client = keyset_page(select(Service).where(Service.client_id == user_id), Service, cursor, limit, dialect)
+    as_driver = keyset_page(
+        select(Service).where(
+            Service.driver_id == user_id,
+            or_(Service.client_id != user_id, Service.client_id.is_(None)),
+        ),
+        Service, cursor, limit, dialect,
+    )
+    both = union_all(select(as_client.subquery()), select(as_driver.subquery())).subquery()
+    service = aliased(Service, both)
+    return keyset_page(select(service), service, None, limit, dialect)
@@ -1,87 +1,163 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.models import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash
-from typing import Optional 
+from app.database.session import AsyncReadSessionLocal
+from app.core.config import settings
+from app.core.pagination import keyset_page, split_page
+from app.core.security import get_password_hash_async
+from app.core.etag import entity_versions
+from typing import Optional
 
 # Obtener un usuario por ID
-def get_user_by_id(db: Session, user_id: int) -> User | None:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
     """
     Devuelve un usuario por su ID.
     """
-    return db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
 
 
 # Obtener un usuario por email
-def get_user_by_email(db: Session, email: str) -> User | None:
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """
     Devuelve un usuario por su email.
     """
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
 # Crear un nuevo usuario
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> Row:
     """
-    Crea un nuevo usuario en la base de datos.
+    Crea un nuevo usuario con un único INSERT ... RETURNING y devuelve solo
+    las columnas que necesita la respuesta (id, email).
     """
-    hashed_password = get_password_hash(user.password)  # Hashing seguro
-    db_user = User(
-        email=user.email,
-        name=user.name,
-        hashed_password=hashed_password,
-        role_id=user.role_id,        
-        created_by="systems"
+    hashed_password = await get_password_hash_async(user.password)  # Hashing seguro
+    result = await db.execute(
+        insert(User)
+        .values(
+            email=user.email,
+            name=user.name,
+            hashed_password=hashed_password,
+            role_id=user.role_id,
+            created_by="systems"
+        )
+        .returning(User.id, User.email)
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    new_user = result.one()
+    await db.commit()
+    return new_user
+
+
+# Columnas de la respuesta de perfil y de su versión (ETag)
+_PROFILE_COLUMNS = (User.id, User.name, User.email, User.role_id, User.created_at, User.updated_at)
+
+
+def _keyed_update(*conditions):
+    # UPDATE por clave sin cargar ni sincronizar objetos de la sesión
+    return update(User).where(*conditions).execution_options(synchronize_session=False)
 
 
 # Actualizar contraseña de un usuario
-def update_user_password(db: Session, user_id: int, new_hashed_password: str) -> bool:
+async def update_user_password(db: AsyncSession, user_id: int, new_hashed_password: str) -> bool:
     """
-    Actualiza la contraseña de un usuario.
+    Actualiza la contraseña de un usuario con un UPDATE por clave, sin
+    cargar el objeto. Devuelve False si el usuario no existe.
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        user.hashed_password = new_hashed_password
-        db.commit()
-        db.refresh(user)
-        return True
-    return False
+    result = await db.execute(
+        _keyed_update(User.id == user_id).values(hashed_password=new_hashed_password).returning(User.id)
+    )
+    updated = result.scalar() is not None
+    await db.commit()
+    if updated:
+        # updated_at cambió: la próxima lectura recalcula el ETag
+        entity_versions.discard("user", user_id)
+    return updated
+
+
+# Restablecer la contraseña a partir del correo
+async def reset_user_password(db: AsyncSession, email: str, new_hashed_password: str) -> Optional[int]:
+    """
+    Como `update_user_password`, pero localiza al usuario por email en el
+    mismo UPDATE. Devuelve su ID, o None si no existe.
+    """
+    result = await db.execute(
+        _keyed_update(User.email == email).values(hashed_password=new_hashed_password).returning(User.id)
+    )
+    user_id = result.scalar()
+    await db.commit()
+    if user_id is not None:
+        entity_versions.discard("user", user_id)
+    return user_id
 
 
 # Actualizar perfil de un usuario
-def update_user_profile(db: Session, email: str, name: Optional[str], new_email: Optional[str]):
+async def update_user_profile(db: AsyncSession, email: str, name: Optional[str], new_email: Optional[str]) -> Row | None:
     """
-    Actualiza el nombre y/o correo electrónico de un usuario autenticado.
+    Actualiza el nombre y/o correo electrónico de un usuario autenticado
+    con un único UPDATE ... RETURNING de las columnas del perfil.
     """
-    user = db.query(User).filter(User.email == email).first()
-    if user:
-        user.name = name if name else user.name
-        user.email = new_email if new_email else user.email
-        db.commit()
-        db.refresh(user)
-        return user
-    return None
+    changes = {}
+    if name:
+        changes["name"] = name
+    if new_email:
+        changes["email"] = new_email
+    if not changes:
+        result = await db.execute(select(*_PROFILE_COLUMNS).where(User.email == email))
+        return result.first()
+
+    result = await db.execute(_keyed_update(User.email == email).values(**changes).returning(*_PROFILE_COLUMNS))
+    user = result.first()
+    await db.commit()
+    if user is not None:
+        entity_versions.put("user", user)
+    return user
 
 
-# Obtener todos los usuarios
-def get_users(db: Session) -> list[User]:
+# Eliminar un usuario
+async def delete_user(db: AsyncSession, email: str) -> Optional[int]:
     """
-    Devuelve una lista de todos los usuarios.
+    Elimina al usuario con un único DELETE ... RETURNING. Devuelve su ID,
+    o None si no existía.
     """
-    return db.query(User).all()
+    result = await db.execute(
+        delete(User).where(User.email == email).returning(User.id).execution_options(synchronize_session=False)
+    )
+    user_id = result.scalar()
+    await db.commit()
+    if user_id is not None:
+        entity_versions.discard("user", user_id)
+    return user_id
+
 
-def update_user_password(db: Session, user_id: int, new_hashed_password: str):
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        user.hashed_password = new_hashed_password
-        db.commit()
-        db.refresh(user)
-        return user
-    return None
+# Obtener usuarios paginados
+async def get_users(db: AsyncSession, limit: int, cursor: Optional[str] = None, role_id: Optional[int] = None):
+    """
+    Devuelve una página de usuarios (del más reciente al más antiguo) y el
+    cursor de la página siguiente, o None si no hay más.
+    """
+    stmt = select(User)
+    if role_id is not None:
+        stmt = stmt.where(User.role_id == role_id)
+    stmt = keyset_page(stmt, User, cursor, limit, db.bind.dialect.name)
+    result = await db.execute(stmt)
+    return split_page(list(result.scalars().all()), limit)
 
 
+# Exportar todos los usuarios
+async def iter_users_export(role_id: Optional[int] = None):
+    """
+    Recorre los usuarios con un cursor de servidor, en lotes, sin cargar la
+    tabla completa en memoria. Nunca incluye el hash de la contraseña.
+    """
+    stmt = select(User.id, User.email, User.name, User.role_id, User.created_at, User.updated_at)
+    if role_id is not None:
+        stmt = stmt.where(User.role_id == role_id)
+    stmt = stmt.order_by(User.id).execution_options(yield_per=settings.EXPORT_CHUNK_SIZE)
+    # Lectura masiva: va a la réplica si está configurada
+    async with AsyncReadSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for rows in result.mappings().partitions():
+            yield [dict(row) for row in rows]
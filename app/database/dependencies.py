@@ -1,4 +1,8 @@
-from app.database.session import SessionLocal
+from fastapi import Request
+from sqlalchemy import event
+
+from app.database.routing import mark_write, read_session_factory, replica_enabled
+from app.database.session import SessionLocal, AsyncSessionLocal
 
 def get_db():
     db = SessionLocal()
@@ -8,3 +12,33 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Sesión sobre el primario. No abre la ventana de read-your-writes: sirve
+    para login, refresh, logout y demás escrituras que no son datos del
+    dominio.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_write_db(request: Request):
+    """
+    Sesión sobre el primario para endpoints que escriben datos del dominio
+    (usuarios, servicios). Cada commit efectivo abre la ventana de
+    read-your-writes del cliente; una petición que falla antes de
+    confirmar no la abre.
+    """
+    async with AsyncSessionLocal() as db:
+        if replica_enabled():
+            event.listen(db.sync_session, "after_commit", lambda session: mark_write(request))
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    """
+    Sesión para endpoints de solo lectura: réplica si hay DATABASE_READ_URL,
+    primario si el cliente escribió hace poco.
+    """
+    async with read_session_factory(request)() as db:
+        yield db
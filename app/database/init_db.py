@@ -2,9 +2,28 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from app.database.session import Base, engine
-from app.database.models import User, Service, Role, ServiceStatus
+from app.database.session import Base, engine, SessionLocal
+from app.database.models import User, Service, Role, ServiceStatus, DriverLocation
+from app.database.migrations import run_migrations
+from app.core.lookups import DEFAULT_ROLES, DEFAULT_SERVICE_STATUSES
 
 def init_db():
+    # create_all crea las tablas que falten; los cambios sobre tablas existentes
+    # (índices, columnas) van como migraciones versionadas en app/database/migrations
     Base.metadata.create_all(bind=engine)
+    seed_lookup_tables()
+    run_migrations(engine)
+
+def seed_lookup_tables():
+    """
+    Inserta los roles y estados de servicio que falten (no toca los existentes).
+    """
+    db = SessionLocal()
+    try:
+        for model, names in ((Role, DEFAULT_ROLES), (ServiceStatus, DEFAULT_SERVICE_STATUSES)):
+            existing = {name for (name,) in db.query(model.name)}
+            db.add_all(model(name=name, created_by="systems") for name in names if name not in existing)
+        db.commit()
+    finally:
+        db.close()
 
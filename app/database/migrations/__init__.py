@@ -0,0 +1,92 @@
+import importlib
+import logging
+import pkgutil
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock de PostgreSQL que serializa las migraciones entre workers
+_LOCK_KEY = 7_450_001
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def discover():
+    """
+    Módulos `vNNNN_*.py` de este paquete, ordenados por versión. Cada uno
+    define VERSION, DESCRIPTION y `upgrade(conn)`; con TRANSACTIONAL = False
+    se ejecuta en autocommit (necesario para CREATE INDEX CONCURRENTLY).
+    """
+    modules = [
+        importlib.import_module(f"{__name__}.{info.name}")
+        for info in pkgutil.iter_modules(__path__)
+        if info.name.startswith("v")
+    ]
+    modules.sort(key=lambda module: module.VERSION)
+    versions = [module.VERSION for module in modules]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Versiones de migración duplicadas: {versions}")
+    return modules
+
+
+# --------------------------------------------------------------------
+# 🧱 Ejecución de migraciones versionadas
+# --------------------------------------------------------------------
+def run_migrations(engine: Engine) -> list[int]:
+    """
+    Aplica en orden las migraciones que falten y las registra en
+    `schema_migrations`. Es idempotente y segura con varios workers
+    arrancando a la vez. Devuelve las versiones aplicadas.
+    """
+    is_postgres = engine.dialect.name == "postgresql"
+    applied_now = []
+    with engine.connect() as lock_conn:
+        if is_postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+            lock_conn.commit()
+        try:
+            _metadata.create_all(engine)
+            with engine.connect() as conn:
+                applied = set(conn.scalars(select(schema_migrations.c.version)))
+
+            for module in discover():
+                if module.VERSION in applied:
+                    continue
+                logger.info(f"Aplicando migración {module.VERSION}: {module.DESCRIPTION}")
+                if getattr(module, "TRANSACTIONAL", True):
+                    with engine.begin() as conn:
+                        module.upgrade(conn)
+                        _record(conn, module)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        module.upgrade(conn)
+                        _record(conn, module)
+                applied_now.append(module.VERSION)
+        finally:
+            if is_postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+                lock_conn.commit()
+    return applied_now
+
+
+def _record(conn, module) -> None:
+    try:
+        conn.execute(insert(schema_migrations).values(
+            version=module.VERSION,
+            description=module.DESCRIPTION,
+            applied_at=datetime.now(timezone.utc),
+        ))
+    except IntegrityError:
+        # Otro proceso (SQLite, sin advisory lock) la registró primero; el DDL es idempotente
+        pass
@@ -0,0 +1,25 @@
+from typing import Optional, Sequence
+
+from sqlalchemy import text
+
+
+def create_index(conn, name: str, table: str, columns: Sequence[str], where: Optional[str] = None) -> None:
+    """
+    CREATE INDEX idempotente. En PostgreSQL usa CONCURRENTLY para no
+    bloquear escrituras en tablas grandes (requiere TRANSACTIONAL = False).
+    """
+    concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    sql = f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    if where:
+        sql += f" WHERE {where}"
+    conn.execute(text(sql))
+
+
+def lookup_id(conn, table: str, name: str) -> int:
+    """
+    Id de una fila de catálogo (roles, service_status) por nombre.
+    """
+    value = conn.execute(text(f"SELECT id FROM {table} WHERE name = :name"), {"name": name}).scalar()
+    if value is None:
+        raise RuntimeError(f"Falta '{name}' en {table}; los catálogos se siembran antes de migrar")
+    return value
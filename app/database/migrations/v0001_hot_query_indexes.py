@@ -0,0 +1,18 @@
+from app.database.migrations.ops import create_index, lookup_id
+
+VERSION = 1
+DESCRIPTION = "Índices compuestos y parcial para listados y servicios pendientes"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    # Servicios de un usuario como cliente / conductor, en orden de keyset
+    create_index(conn, "ix_services_client_created", "services", ["client_id", "created_at", "id"])
+    create_index(conn, "ix_services_driver_created", "services", ["driver_id", "created_at", "id"])
+    # Listado general paginado
+    create_index(conn, "ix_services_created", "services", ["created_at", "id"])
+    # Solo pendientes: carga del índice espacial y filtros por estado pendiente
+    pending = lookup_id(conn, "service_status", "pending")
+    create_index(conn, "ix_services_pending", "services", ["created_at", "id"], where=f"status_id = {int(pending)}")
+    # Listado de usuarios paginado
+    create_index(conn, "ix_users_created", "users", ["created_at", "id"])
@@ -0,0 +1,10 @@
+from app.database.migrations.ops import create_index
+
+VERSION = 2
+DESCRIPTION = "Índice parcial de familias de refresh tokens revocadas"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    # Sincronización periódica del conjunto de revocación: solo filas revocadas
+    create_index(conn, "ix_refresh_tokens_revoked", "refresh_tokens", ["revoked_at"], where="revoked_at IS NOT NULL")
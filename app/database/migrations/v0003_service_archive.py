@@ -0,0 +1,14 @@
+from app.database.migrations.ops import create_index, lookup_id
+
+VERSION = 3
+DESCRIPTION = "Índice parcial de servicios terminados para el job de archivo"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    # El archivo busca terminados anteriores al corte sin recorrer la tabla caliente
+    finished = [int(lookup_id(conn, "service_status", name)) for name in ("completed", "cancelled")]
+    create_index(
+        conn, "ix_services_finished_created", "services", ["created_at", "id"],
+        where=f"status_id IN ({', '.join(map(str, finished))})",
+    )
@@ -1,6 +1,11 @@
 from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, func
 from sqlalchemy.orm import relationship
 from app.database.session import Base
+from app.core.lookups import lookups
+
+# Las relaciones no se cargan de forma perezosa: acceder a una sin haberla
+# pedido con selectinload/joinedload lanza un error en vez de lanzar una
+# consulta por fila (N+1). Estado y rol se resuelven con `lookups`.
 
 class Role(Base):
     __tablename__ = "roles"
@@ -30,7 +35,7 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
 
     role_id = Column(Integer, ForeignKey("roles.id"), nullable=False)
-    role = relationship("Role")
+    role = relationship("Role", lazy="raise_on_sql")
 
     created_by = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -48,12 +53,45 @@ class Service(Base):
     destination_lng = Column(Float)
 
     status_id = Column(Integer, ForeignKey("service_status.id"), nullable=False)
-    status = relationship("ServiceStatus")
+    status = relationship("ServiceStatus", lazy="raise_on_sql")
+
+    client = relationship("User", foreign_keys=[client_id], lazy="raise_on_sql")
+    driver = relationship("User", foreign_keys=[driver_id], lazy="raise_on_sql")
 
-    client = relationship("User", foreign_keys=[client_id])
-    driver = relationship("User", foreign_keys=[driver_id])
+    @property
+    def status_name(self):
+        # Resuelto desde el registro en memoria, sin cargar la relación
+        return lookups.statuses.name_of(self.status_id)
 
     created_by = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_by = Column(String, nullable=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class DriverLocation(Base):
+    __tablename__ = "driver_locations"
+    driver_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    lat = Column(Float, nullable=False)
+    lng = Column(Float, nullable=False)
+    heading = Column(Float, nullable=True)
+    speed_kmh = Column(Float, nullable=True)
+    recorded_at = Column(DateTime(timezone=True), nullable=False)
+
+    created_by = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_by = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # HMAC-SHA256 del token; el valor en claro solo lo tiene el cliente
+    token_hash = Column(String(64), unique=True, nullable=False)
+    # Cadena de rotaciones de un mismo login; se revoca completa ante reutilización
+    family_id = Column(String(32), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,148 @@
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from http.cookies import SimpleCookie
+from typing import Iterable, Optional
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.database.session import AsyncReadSessionLocal, AsyncSessionLocal, async_engine, read_async_engine
+
+db_read_routing = Counter("db_read_routing_total", "Sesiones de lectura por destino", ["target"])
+
+# Marca de lectura desde el primario que viaja con el cliente (sirve entre workers)
+PRIMARY_COOKIE = "gg_primary_until"
+
+
+# --------------------------------------------------------------------
+# ✍️ Clientes con escrituras recientes
+# --------------------------------------------------------------------
+class RecentWriters:
+    """
+    Recuerda qué clientes escribieron hace menos de `window` segundos para
+    que sus lecturas vayan al primario (la réplica puede ir con retraso).
+    LRU acotada; solo debe usarse desde el event loop.
+    """
+
+    def __init__(self, window: float, max_entries: int = 100_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._until: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._until)
+
+    def mark(self, keys: Iterable[str], now: Optional[float] = None) -> float:
+        until = (now if now is not None else time.monotonic()) + self.window
+        for key in keys:
+            self._until[key] = until
+            self._until.move_to_end(key)
+        while len(self._until) > self.max_entries:
+            self._until.popitem(last=False)
+        return until
+
+    def is_recent(self, keys: Iterable[str], now: Optional[float] = None) -> bool:
+        now = now if now is not None else time.monotonic()
+        for key in keys:
+            until = self._until.get(key)
+            if until is None:
+                continue
+            if until > now:
+                return True
+            del self._until[key]
+        return False
+
+
+def client_keys(request: Request) -> list[str]:
+    """
+    Identifica al cliente por su token. No se usa la IP: detrás de un NAT o
+    proxy compartido, una escritura llevaría al primario a todos sus
+    lectores. Los clientes sin token se reconocen solo por la cookie.
+    """
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return []
+    return ["t:" + hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()]
+
+
+def replica_enabled() -> bool:
+    return read_async_engine is not async_engine
+
+
+def mark_write(request: Request) -> None:
+    """
+    Registra la escritura del cliente (el registro en memoria es por
+    worker) y deja en el estado de la petición el fin de la ventana para
+    que ReadYourWritesMiddleware envíe la cookie, que sí sirve entre workers.
+    """
+    if not replica_enabled():
+        return
+    recent_writers.mark(client_keys(request))
+    request.state.primary_until = time.time() + settings.READ_YOUR_WRITES_SECONDS
+
+
+def _primary_cookie(until: float) -> bytes:
+    cookie = SimpleCookie()
+    cookie[PRIMARY_COOKIE] = f"{until:.3f}"
+    morsel = cookie[PRIMARY_COOKIE]
+    morsel["max-age"] = math.ceil(settings.READ_YOUR_WRITES_SECONDS)
+    morsel["path"] = "/"
+    morsel["httponly"] = True
+    morsel["samesite"] = "lax"
+    return morsel.OutputString().encode("latin-1")
+
+
+# --------------------------------------------------------------------
+# 🍪 Middleware: cookie de lectura desde el primario
+# --------------------------------------------------------------------
+class ReadYourWritesMiddleware:
+    """
+    Middleware ASGI que añade la cookie PRIMARY_COOKIE a la respuesta final
+    si la petición registró una escritura (`mark_write`). Así llega también
+    cuando la ruta devuelve su propio Response o un StreamingResponse.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                until = scope.get("state", {}).get("primary_until")
+                if until is not None:
+                    message["headers"] = [*message.get("headers", ()), (b"set-cookie", _primary_cookie(until))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _cookie_active(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_session_factory(request: Request) -> async_sessionmaker:
+    """
+    Fábrica de sesiones para una lectura: la réplica, salvo que el cliente
+    haya escrito dentro de READ_YOUR_WRITES_SECONDS.
+    """
+    if not replica_enabled():
+        return AsyncSessionLocal
+    if _cookie_active(request) or recent_writers.is_recent(client_keys(request)):
+        db_read_routing.labels("primary").inc()
+        return AsyncSessionLocal
+    db_read_routing.labels("replica").inc()
+    return AsyncReadSessionLocal
+
+
+recent_writers = RecentWriters(settings.READ_YOUR_WRITES_SECONDS)
@@ -1,14 +1,101 @@
+import os
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.query_stats import instrument_engine, instrument_pool
 
 # Crear la base declarativa
 Base = declarative_base()
 
+
+def async_database_url(url: str) -> str:
+    """
+    Traduce la URL síncrona al driver asíncrono equivalente
+    (psycopg3 para PostgreSQL, aiosqlite para SQLite).
+    """
+    url_obj = make_url(url)
+    backend = url_obj.get_backend_name()
+    if backend == "postgresql":
+        url_obj = url_obj.set(drivername="postgresql+psycopg")
+    elif backend == "sqlite":
+        url_obj = url_obj.set(drivername="sqlite+aiosqlite")
+    return url_obj.render_as_string(hide_password=False)
+
+
+# Variable que el lanzador (app/server.py) exporta a sus workers con el
+# número de procesos ya resuelto
+WORKERS_ENV = "GRUAGO_SERVER_WORKERS"
+
+
+def worker_count() -> int:
+    """
+    Procesos que comparten DB_CONNECTION_BUDGET. Lo fija el lanzador; un
+    proceso arrancado de otra forma (uvicorn app.main:app, tests) es uno solo.
+    """
+    return max(1, int(os.environ.get(WORKERS_ENV, "1")))
+
+
+def pool_limits(workers: int, budget: int, sync_pool_size: int) -> dict:
+    """
+    Reparte DB_CONNECTION_BUDGET entre los workers: cada uno reserva
+    `sync_pool_size` para el motor síncrono y el resto va al asíncrono,
+    2/3 como conexiones fijas y 1/3 como overflow. Así N workers nunca
+    abren más de `budget` conexiones en total; si el presupuesto no
+    alcanza para una conexión asíncrona por worker, falla (ValueError).
+    """
+    share = budget // workers
+    if share < sync_pool_size + 1:
+        raise ValueError(
+            f"DB_CONNECTION_BUDGET={budget} no alcanza para {workers} workers "
+            f"(cada uno necesita al menos {sync_pool_size + 1} conexiones)"
+        )
+    async_share = share - sync_pool_size
+    pool_size = max(1, async_share * 2 // 3)
+    return {
+        "sync": {"pool_size": sync_pool_size, "max_overflow": 0},
+        "async": {"pool_size": pool_size, "max_overflow": async_share - pool_size},
+    }
+
+
+def _pool_options(url: str, name: str) -> dict:
+    # Solo PostgreSQL: SQLite es de desarrollo, un único proceso con su pool por defecto
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+    limits = pool_limits(worker_count(), settings.DB_CONNECTION_BUDGET, settings.DB_SYNC_POOL_SIZE)[name]
+    return dict(limits, pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS)
+
+
 # Crear el motor de la base de datos compatible con psycopg3 y SQLAlchemy 2.0
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, echo=False, future=True)
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, echo=False, future=True,
+                       **_pool_options(settings.DATABASE_URL, "sync"))
 
 # Configurar la sesión local
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Motor y sesión asíncronos para las rutas (no bloquean el event loop)
+async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), pool_pre_ping=True, echo=False,
+                                   **_pool_options(settings.DATABASE_URL, "async"))
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Réplica de lectura opcional: sin DATABASE_READ_URL las lecturas usan el primario
+if settings.DATABASE_READ_URL:
+    read_async_engine = create_async_engine(async_database_url(settings.DATABASE_READ_URL), pool_pre_ping=True,
+                                            echo=False, **_pool_options(settings.DATABASE_READ_URL, "async"))
+else:
+    read_async_engine = async_engine
+
+AsyncReadSessionLocal = async_sessionmaker(bind=read_async_engine, autoflush=False, expire_on_commit=False)
+
+# Conteo de sentencias y tiempo en BD por petición
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+instrument_pool(engine, "sync")
+instrument_pool(async_engine.sync_engine, "async")
+if read_async_engine is not async_engine:
+    instrument_engine(read_async_engine.sync_engine)
+    instrument_pool(read_async_engine.sync_engine, "async_read")
@@ -2,11 +2,28 @@ import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from app.api.routes import auth, user, service
+from app.api.routes import auth, user, service, dispatch, driver, metrics
 from app.database.init_db import init_db
 from app.core.config import settings  # Importa las variables desde .env
+from app.core.lookups import lookups
+from app.core.spatial_index import pending_services_index
+from app.core.dispatch import dispatcher
+from app.core.location_store import driver_locations
+from app.core.revocation import revoked_sessions
+from app.core.service_archive import service_archive
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.http_metrics import HTTPMetricsMiddleware
+from app.core.request_log import RequestLogMiddleware
+from app.database.routing import ReadYourWritesMiddleware
+from app.utils.logger import logger, setup_logging, shutdown_logging
+from app.database.session import SessionLocal, async_engine, engine
 
 app = FastAPI(title="GruaGo API")
+# El primero que se añade es el más interno: el log de acceso ve la ruta resuelta y las consultas
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(RequestLogMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(HTTPMetricsMiddleware)
 
 # Crear carpetas estáticas y logs antes de montar
 for folder in [
@@ -23,13 +40,48 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Evento de inicio de la aplicación
 @app.on_event("startup")
 def startup_event():
+    # Logging JSON en segundo plano hacia logs/
+    setup_logging()
+
     # Inicializar la base de datos
     init_db()
+    logger.info("Worker %s listo; pool síncrono: %s; pool asíncrono: %s",
+                os.getpid(), engine.pool.status(), async_engine.pool.status())
+
+    # Cargar catálogos (roles/estados) y el índice espacial de servicios pendientes
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+        pending_services_index.load(db)
+        driver_locations.load(db)
+        revoked_sessions.load(db)
+    finally:
+        db.close()
+
+    # Persistencia en lote de ubicaciones y ronda de despacho periódica
+    driver_locations.start()
+    dispatcher.driver_source = lambda: driver_locations.fresh_positions(settings.DRIVER_LOCATION_MAX_AGE_SECONDS)
+    dispatcher.start()
+    revoked_sessions.start()
+    # Mueve al histórico en disco los servicios terminados antiguos (si está activo);
+    # falla el arranque si el directorio no es absoluto
+    service_archive.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await dispatcher.stop()
+    await revoked_sessions.stop()
+    await service_archive.stop()
+    await driver_locations.stop()
+    shutdown_logging()
 
 # Incluir rutas
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(user.router, prefix="/users", tags=["Users"])
 app.include_router(service.router, prefix="/services", tags=["Services"])
+app.include_router(dispatch.router, prefix="/dispatch", tags=["Dispatch"])
+app.include_router(driver.router, prefix="/drivers", tags=["Drivers"])
+app.include_router(metrics.router, tags=["Metrics"])
 
 # Punto de entrada principal
 if __name__ == "__main__":
@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class DriverPositionIn(BaseModel):
+    driver_id: int
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+
+
+class DispatchRoundRequest(BaseModel):
+    drivers: List[DriverPositionIn]
+    max_distance_km: Optional[float] = Field(None, gt=0)
+
+
+class DispatchAssignmentOut(BaseModel):
+    service_id: int
+    driver_id: int
+    distance_km: float
+
+
+class DispatchRoundResponse(BaseModel):
+    solver: str
+    assignments: List[DispatchAssignmentOut]
+    unassigned_services: List[int]
+    idle_drivers: List[int]
+    conflicts: int
+    solve_ms: float
+    elapsed_ms: float
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class DriverLocationIn(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    heading: Optional[float] = Field(None, ge=0, lt=360)
+    speed_kmh: Optional[float] = Field(None, ge=0)
+    recorded_at: Optional[datetime] = None
+
+
+class DriverLocationOut(BaseModel):
+    driver_id: int
+    lat: float
+    lng: float
+    heading: Optional[float] = None
+    speed_kmh: Optional[float] = None
+    recorded_at: datetime
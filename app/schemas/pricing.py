@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+
+
+class QuoteRequest(BaseModel):
+    pickup_lat: float = Field(..., ge=-90, le=90)
+    pickup_lng: float = Field(..., ge=-180, le=180)
+    destination_lat: float = Field(..., ge=-90, le=90)
+    destination_lng: float = Field(..., ge=-180, le=180)
+
+
+class QuoteResponse(BaseModel):
+    distance_km: float
+    duration_min: float  # ETA del trayecto recogida → destino
+    price: float
+    currency: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class ServiceRequestCreate(BaseModel):
@@ -18,17 +18,47 @@ class ServiceResponse(BaseModel):
     pickup_lng: float
     destination_lat: float
     destination_lng: float
-    status: str
+    status: str = Field(validation_alias="status_name")
 
     class Config:
         from_attributes = True
 
 
+class ServiceActionResponse(BaseModel):
+    message: str
+    service: ServiceResponse
+
+
+class BatchCreatedItem(BaseModel):
+    index: int
+    id: int
+
+
+class BatchErrorItem(BaseModel):
+    index: int
+    error: str
+
+
+class BatchServiceResponse(BaseModel):
+    created: list[BatchCreatedItem]
+    errors: list[BatchErrorItem]
+
+
+class NearbyServiceResponse(BaseModel):
+    id: int
+    client_id: int
+    pickup_lat: float
+    pickup_lng: float
+    destination_lat: float
+    destination_lng: float
+    distance_km: float
+
+
 class ServiceOut(BaseModel):
     id: int
     client_id: int
     driver_id: int | None
-    status: str
+    status: str = Field(validation_alias="status_name")
 
     class Config:
         from_attributes = True
@@ -0,0 +1,99 @@
+"""
+Lanzador de producción: varios workers de uvicorn detrás de un supervisor.
+
+    python -m app.server            # desde la raíz del repositorio
+    python server.py                # dentro del contenedor (WORKDIR /app)
+
+- WEB_WORKERS procesos (por defecto 1; 0 = número de CPUs).
+- El supervisor reinicia los workers que mueren; `kill -HUP <pid>` los
+  reinicia uno a uno (recarga sin cortar el puerto) y SIGTTIN/SIGTTOU
+  añaden o quitan un worker.
+- Cada worker abre como máximo DB_CONNECTION_BUDGET / WEB_WORKERS
+  conexiones (ver `pool_limits` en app/database/session.py).
+
+Parte del estado vive en memoria de cada proceso (ver `per_process_state`):
+con varios workers un cliente SSE no recibe los eventos publicados en
+otro, `/services/nearby` y el despacho ven solo una parte de los
+pendientes y conductores, y los límites de intentos se multiplican por N.
+Mientras ese estado no pase a un backend compartido, el lanzador se niega
+a arrancar más de un worker salvo con WEB_ALLOW_PER_PROCESS_STATE=true.
+"""
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.database.session import WORKERS_ENV, pool_limits
+
+logger = logging.getLogger("app.server")
+
+
+def resolve_workers() -> int:
+    """
+    Workers a lanzar, limitados para que cada uno reciba al menos una
+    conexión asíncrona además de su pool síncrono.
+    """
+    workers = settings.WEB_WORKERS or os.cpu_count() or 1
+    max_workers = max(1, settings.DB_CONNECTION_BUDGET // (settings.DB_SYNC_POOL_SIZE + 1))
+    if workers > max_workers:
+        logger.warning(
+            "WEB_WORKERS=%s no cabe en DB_CONNECTION_BUDGET=%s; se usan %s workers",
+            workers, settings.DB_CONNECTION_BUDGET, max_workers,
+        )
+        workers = max_workers
+    return workers
+
+
+def per_process_state() -> list[str]:
+    """
+    Funciones activas cuyo estado no se comparte entre workers.
+    """
+    state = ["eventos SSE", "índice espacial de pendientes", "ubicaciones de conductores"]
+    if settings.DISPATCH_INTERVAL_SECONDS > 0:
+        state.append("ronda de despacho")
+    if settings.ETAG_CACHE_MAX_ENTRIES > 0:
+        state.append("caché de versiones (ETag)")
+    if settings.RATE_LIMIT_ENABLED:
+        state.append("límite de intentos")
+    return state
+
+
+def main() -> None:
+    import uvicorn
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    workers = resolve_workers()
+    if workers > 1 and not settings.WEB_ALLOW_PER_PROCESS_STATE:
+        raise SystemExit(
+            f"WEB_WORKERS={workers} rechazado: el estado de {', '.join(per_process_state())} es por proceso. "
+            "Usa un solo worker o WEB_ALLOW_PER_PROCESS_STATE=true si aceptas esas limitaciones."
+        )
+    # Los workers leen el número resuelto para calcular su parte del presupuesto
+    os.environ[WORKERS_ENV] = str(workers)
+
+    # Esquema y migraciones una sola vez, antes de crear los workers
+    from app.database.init_db import init_db
+    from app.database.session import engine
+    init_db()
+    engine.dispose()  # el supervisor no debe retener conexiones del presupuesto
+
+    limits = pool_limits(workers, settings.DB_CONNECTION_BUDGET, settings.DB_SYNC_POOL_SIZE)
+    logger.info("Iniciando %s workers en %s:%s; pool por worker: %s", workers, settings.HOST, settings.PORT, limits)
+    if workers > 1:
+        logger.warning("Estado por worker (WEB_ALLOW_PER_PROCESS_STATE): %s", ", ".join(per_process_state()))
+
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        proxy_headers=True,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT_SECONDS,
+        access_log=False,  # el log de acceso lo escribe RequestLogMiddleware
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import math
+
+# Radio medio de la Tierra en kilómetros
+EARTH_RADIUS_KM = 6371.0088
+
+# Kilómetros por grado de latitud (aproximación constante)
+KM_PER_DEG_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Distancia de gran círculo entre dos coordenadas, en kilómetros.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def km_to_deg_lng(km: float, lat: float) -> float:
+    """
+    Convierte una distancia en km a grados de longitud a la latitud dada.
+    """
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    return km / (KM_PER_DEG_LAT * cos_lat)
+
+
+def unit_vectors(lat, lng):
+    """
+    Convierte arreglos de lat/lng (grados) a vectores unitarios 3D (n, 3).
+    """
+    import numpy as np
+
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lmb = np.radians(np.asarray(lng, dtype=np.float64))
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lmb), cos_phi * np.sin(lmb), np.sin(phi)))
+
+
+def haversine_matrix_km(lat1, lng1, lat2, lng2):
+    """
+    Matriz (n, m) de distancias de gran círculo en km entre dos conjuntos de puntos.
+    Usa la forma de cuerda del haversine (sin²(θ/2) = (1 - u·v) / 2), de modo
+    que el trabajo pesado es un único producto matricial.
+    """
+    import numpy as np
+
+    dot = unit_vectors(lat1, lng1) @ unit_vectors(lat2, lng2).T
+    np.clip(dot, -1.0, 1.0, out=dot)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt((1.0 - dot) * 0.5))
+
+
+def haversine_pairwise_km(lat1, lng1, lat2, lng2):
+    """
+    Distancias de gran círculo elemento a elemento (arreglos de igual tamaño), en km.
+    """
+    import numpy as np
+
+    phi1 = np.radians(np.asarray(lat1, dtype=np.float64))
+    phi2 = np.radians(np.asarray(lat2, dtype=np.float64))
+    dlmb = np.radians(np.asarray(lng2, dtype=np.float64) - np.asarray(lng1, dtype=np.float64))
+    a = np.sin((phi2 - phi1) * 0.5) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb * 0.5) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -1,10 +1,154 @@
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename='backend.log',
-    filemode='a'
-)
-logger = logging.getLogger(__name__)
+from app.core.config import settings
+from app.core.metrics import Counter
 
+logs_dropped = Counter("logs_dropped_total", "Registros de log descartados por cola llena")
+logs_sampled_out = Counter("logs_sampled_out_total", "Registros DEBUG descartados por muestreo")
+
+# Contexto de la petición en curso, leído al emitir cada registro
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+route_var: ContextVar[Optional[str]] = ContextVar("route", default=None)
+
+# Atributos estándar de LogRecord que no se copian como campos extra
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id", "route"}
+
+
+# --------------------------------------------------------------------
+# 🧾 Formato JSON
+# --------------------------------------------------------------------
+class JSONFormatter(logging.Formatter):
+    """
+    Una línea JSON por registro. Los campos pasados con `extra={...}` se
+    incluyen tal cual (p. ej. `latency_ms`, `status`).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+            payload["route"] = getattr(record, "route", None)
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+# --------------------------------------------------------------------
+# 📨 Cola: el hilo de la petición solo encola, un hilo aparte escribe
+# --------------------------------------------------------------------
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Captura el contexto de la petición y encola el registro sin formatearlo
+    (el formateo JSON y la escritura a disco ocurren en el QueueListener).
+    Si la cola está llena el registro se descarta en vez de bloquear.
+    Los DEBUG se muestrean: solo pasa 1 de cada `1 / debug_sample_rate`.
+    """
+
+    def __init__(self, log_queue: queue.Queue, debug_sample_rate: float = 1.0):
+        super().__init__(log_queue)
+        self.debug_every = max(1, round(1 / debug_sample_rate)) if debug_sample_rate > 0 else 0
+        self._debug_seen = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno < logging.INFO:
+            # Contador sin lock: bajo carrera puede desviarse, pero la tasa se mantiene
+            self._debug_seen += 1
+            if not self.debug_every or self._debug_seen % self.debug_every:
+                logs_sampled_out.inc()
+                return
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            logs_dropped.inc()
+
+
+def _file_handler() -> logging.Handler:
+    os.makedirs(settings.LOG_DIR, exist_ok=True)
+    # {pid} en el nombre da un archivo por worker: la rotación no es segura entre procesos
+    path = os.path.join(settings.LOG_DIR, settings.LOG_FILE.format(pid=os.getpid()))
+    if settings.LOG_ROTATION == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=settings.LOG_ROTATE_WHEN, backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+def setup_logging() -> None:
+    """
+    Configura el logger raíz: ContextQueueHandler → QueueListener →
+    archivo rotado en LOG_DIR (y stdout si LOG_STDOUT). Idempotente.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        # Optimizaciones documentadas de logging: el JSON no usa archivo/línea,
+        # hilo ni proceso, así que no se calculan al crear cada registro
+        logging._srcfile = None
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        formatter = JSONFormatter()
+        targets = [_file_handler()]
+        if settings.LOG_STDOUT:
+            targets.append(logging.StreamHandler(sys.stdout))
+        for handler in targets:
+            handler.setFormatter(formatter)
+
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, ContextQueueHandler):
+                root.removeHandler(handler)
+        root.addHandler(ContextQueueHandler(log_queue, settings.LOG_DEBUG_SAMPLE_RATE))
+        root.setLevel(settings.LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(log_queue, *targets, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Vacía la cola y detiene el hilo escritor.
+    """
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+logger = logging.getLogger("app")
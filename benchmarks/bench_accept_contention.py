@@ -0,0 +1,120 @@
+"""
+Benchmark de contención: N conductores aceptan el mismo servicio a la vez.
+
+Compara el flujo anterior (leer, comprobar, mutar, commit, refresh) con el
+UPDATE condicional de `update_service_status`. Reporta cuántos ganadores hubo
+por servicio (debe ser exactamente 1) y la latencia de cada intento.
+
+Uso:
+    DATABASE_URL=sqlite:///bench_accept.db python -m benchmarks.bench_accept_contention [--drivers 20] [--trials 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_accept.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import select
+
+from app.core.lookups import lookups
+from app.crud.service import ServiceStateError, update_service_status
+from app.database.init_db import init_db
+from app.database.models import Service, User
+from app.database.session import AsyncSessionLocal, SessionLocal
+
+
+async def legacy_accept(db, service_id: int, driver_id: int):
+    # Réplica del flujo anterior: la ruta carga el servicio, el CRUD lo vuelve
+    # a cargar, comprueba el estado, muta, hace commit y refresh.
+    service = (await db.execute(select(Service).where(Service.id == service_id))).scalars().first()
+    if service.client_id == driver_id:
+        raise ServiceStateError("No puedes aceptar tu propio servicio")
+    service = (await db.execute(select(Service).where(Service.id == service_id))).scalars().first()
+    if service.status_id != lookups.statuses.id_of("pending"):
+        raise ServiceStateError("El servicio ya fue aceptado")
+    service.driver_id = driver_id
+    service.status_id = lookups.statuses.id_of("accepted")
+    await db.commit()
+    await db.refresh(service)
+    return service
+
+
+def _seed(drivers: int) -> tuple[int, list[int]]:
+    init_db()
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+        emails = [("bench-client@gruago.test", "client")]
+        emails += [(f"bench-driver{i}@gruago.test", "driver") for i in range(drivers)]
+        for email, role in emails:
+            if not db.query(User).filter(User.email == email).first():
+                db.add(User(email=email, name=email, hashed_password="x", role_id=lookups.roles.id_of(role)))
+        db.commit()
+        client_id = db.query(User.id).filter(User.email == "bench-client@gruago.test").scalar()
+        driver_ids = [
+            row[0] for row in db.query(User.id).filter(User.email.like("bench-driver%")).limit(drivers)
+        ]
+        return client_id, driver_ids
+    finally:
+        db.close()
+
+
+async def _new_service(client_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        service = Service(client_id=client_id, pickup_lat=18.5, pickup_lng=-69.9, destination_lat=18.6,
+                          destination_lng=-69.8, status_id=lookups.statuses.id_of("pending"))
+        db.add(service)
+        await db.commit()
+        return service.id
+
+
+async def _attempt(accept, service_id: int, driver_id: int, latencies: list) -> bool:
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        try:
+            await accept(db, service_id, driver_id)
+            return True
+        except ServiceStateError:
+            return False
+        finally:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def _run(label: str, accept, client_id: int, driver_ids: list[int], trials: int):
+    latencies, winners = [], []
+    for _ in range(trials):
+        service_id = await _new_service(client_id)
+        results = await asyncio.gather(*(_attempt(accept, service_id, d, latencies) for d in driver_ids))
+        winners.append(sum(results))
+    latencies.sort()
+    print(
+        f"{label:8s} conductores={len(driver_ids)} servicios={trials} "
+        f"ganadores/servicio min={min(winners)} max={max(winners)} "
+        f"p50={latencies[len(latencies) // 2]:.2f} ms p99={latencies[int(len(latencies) * 0.99)]:.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=20)
+    parser.add_argument("--trials", type=int, default=50)
+    args = parser.parse_args()
+
+    client_id, driver_ids = _seed(args.drivers)
+
+    async def cas_accept(db, service_id, driver_id):
+        return await update_service_status(db, service_id, "accepted", driver_id)
+
+    async def run_all():
+        await _run("anterior", legacy_accept, client_id, driver_ids, args.trials)
+        await _run("cas", cas_accept, client_id, driver_ids, args.trials)
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark del archivo de servicios: siembra un historial de `--months`
+meses (casi todo terminado), mide el listado de servicios de un usuario y
+el listado general antes y después de mover lo antiguo al histórico
+(NDJSON gzip), y recorre el historial completo con `archived=true` para
+comprobar que cada servicio aparece exactamente una vez.
+
+Uso:
+    DATABASE_URL=sqlite:///bench_archive.db python -m benchmarks.bench_archive [--services 50000] [--months 24]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_archive.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.core.lookups import lookups
+from app.core.security import create_access_token
+from app.core.service_archive import archive_files_read, service_archive
+from app.database.init_db import init_db
+from app.database.models import Service, User
+from app.database.session import SessionLocal
+from app.main import app
+
+USERS = 200
+CHUNK = 5000
+
+
+def _seed(services: int, months: int) -> tuple[int, int, str]:
+    init_db()
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+        db.query(Service).delete()
+        db.commit()
+        role = lookups.roles.id_of("client")
+        ids = db.execute(select(User.id).where(User.email.like("bench-archive-%")).order_by(User.id)).scalars().all()
+        if len(ids) < USERS:
+            db.execute(insert(User), [
+                dict(email=f"bench-archive-{i}@gruago.test", name="bench", hashed_password="x", role_id=role)
+                for i in range(len(ids), USERS)
+            ])
+            db.commit()
+            ids = db.execute(select(User.id).where(User.email.like("bench-archive-%")).order_by(User.id)).scalars().all()
+
+        rng = random.Random(7)
+        now = datetime.now(timezone.utc)
+        finished = [lookups.statuses.id_of("completed"), lookups.statuses.id_of("cancelled")]
+        open_ = [lookups.statuses.id_of("pending"), lookups.statuses.id_of("accepted")]
+        rows = []
+        for _ in range(services):
+            age = timedelta(days=rng.uniform(0, months * 30), microseconds=rng.randint(1, 999999))
+            # Lo reciente mezcla estados; lo antiguo está casi todo terminado
+            status = rng.choice(finished) if age.days > 30 or rng.random() < 0.7 else rng.choice(open_)
+            rows.append(dict(client_id=rng.choice(ids), driver_id=rng.choice(ids), pickup_lat=18.5, pickup_lng=-69.9,
+                             destination_lat=18.6, destination_lng=-69.8, status_id=status, created_at=now - age))
+        # Usuario con poco historial: su lectura no debe depender del tamaño del archivo
+        sparse_id = db.scalar(insert(User).values(email=f"bench-archive-sparse-{rng.random()}@gruago.test", name="bench",
+                                                  hashed_password="x", role_id=role).returning(User.id))
+        for months_ago in (4, 9, 15):
+            rows.append(dict(client_id=sparse_id, driver_id=rng.choice(ids), pickup_lat=18.5, pickup_lng=-69.9,
+                             destination_lat=18.6, destination_lng=-69.8, status_id=finished[0],
+                             created_at=now - timedelta(days=months_ago * 30, microseconds=rng.randint(1, 999999))))
+        for start in range(0, len(rows), CHUNK):
+            db.execute(insert(Service), rows[start:start + CHUNK])
+            db.commit()
+        user_id = ids[0]
+        token = create_access_token(data={"email": "bench", "role": "admin", "role_id": role, "id": user_id})
+        return user_id, sparse_id, token
+    finally:
+        db.close()
+
+
+def _hot_rows() -> int:
+    db = SessionLocal()
+    try:
+        return db.scalar(select(func.count()).select_from(Service))
+    finally:
+        db.close()
+
+
+async def _timed(client: httpx.AsyncClient, url: str, headers: dict, params: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def _history(client: httpx.AsyncClient, user_id: int, headers: dict, archived: bool) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 100, "archived": str(archived).lower()}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(f"/services/services/user/{user_id}", headers=headers, params=params)
+        response.raise_for_status()
+        ids.extend(row["id"] for row in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return ids
+
+
+async def _measure(client: httpx.AsyncClient, user_id: int, sparse_id: int, headers: dict, label: str,
+                   archived: bool = False) -> None:
+    params = {"limit": 50, "archived": str(archived).lower()}
+    user = await _timed(client, f"/services/services/user/{user_id}", headers, params, 20)
+    files = archive_files_read.value
+    sparse = await _timed(client, f"/services/services/user/{sparse_id}", headers, params, 20)
+    files = (archive_files_read.value - files) / 20
+    listing = await _timed(client, "/services/", headers, {"limit": 50, "status": "completed"}, 20)
+    print(f"{label:26s} filas calientes={_hot_rows():7d}  usuario={user:7.2f} ms  "
+          f"usuario con 3 servicios={sparse:7.2f} ms ({files:.0f} archivos leídos)  "
+          f"listado completados={listing:7.2f} ms")
+
+
+async def _run(user_id: int, sparse_id: int, token: str) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        before = await _history(client, user_id, headers, archived=False)
+        await _measure(client, user_id, sparse_id, headers, "sin archivar")
+
+        started = time.perf_counter()
+        moved = await service_archive.archive_once()
+        elapsed = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(service_archive.directory) for name in names)
+        print(f"archivados {moved} servicios en {elapsed:.2f} s ({moved / max(elapsed, 1e-9):,.0f} filas/s), "
+              f"{size / 1024:.0f} KiB en disco")
+
+        await _measure(client, user_id, sparse_id, headers, "archivado (solo caliente)")
+        await _measure(client, user_id, sparse_id, headers, "archivado (archived=true)", archived=True)
+
+        after = await _history(client, user_id, headers, archived=True)
+        hot_only = await _history(client, user_id, headers, archived=False)
+        ok = after == before and len(set(after)) == len(after)
+        print(f"historial del usuario: {len(before)} antes, {len(hot_only)} calientes + archivo = {len(after)} "
+              f"({'mismo orden, sin duplicados' if ok else 'DIFERENTE'})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", type=int, default=50000)
+    parser.add_argument("--months", type=int, default=24)
+    args = parser.parse_args()
+
+    service_archive.directory = tempfile.mkdtemp(prefix="bench-archive-")
+    service_archive.after_days = 90
+    try:
+        user_id, sparse_id, token = _seed(args.services, args.months)
+        asyncio.run(_run(user_id, sparse_id, token))
+    finally:
+        shutil.rmtree(service_archive.directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark de carga masiva de solicitudes: N llamadas a
+`create_service_request` (add → commit → refresh por fila) frente a
+`create_service_requests` (INSERT ... RETURNING multi-fila por bloques).
+
+Uso:
+    DATABASE_URL=sqlite:///bench_batch.db python -m benchmarks.bench_batch_ingest [--items 5000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_batch.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.lookups import lookups
+from app.crud.service import create_service_request, create_service_requests
+from app.database.init_db import init_db
+from app.database.models import User
+from app.database.session import AsyncSessionLocal, SessionLocal
+from app.schemas.service import ServiceRequestCreate
+
+
+def _seed() -> int:
+    init_db()
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+        client = db.query(User).filter(User.email == "bench-batch@gruago.test").first()
+        if client is None:
+            client = User(email="bench-batch@gruago.test", name="bench", hashed_password="x",
+                          role_id=lookups.roles.id_of("client"))
+            db.add(client)
+            db.commit()
+        return client.id
+    finally:
+        db.close()
+
+
+def _items(client_id: int, count: int) -> list[ServiceRequestCreate]:
+    return [
+        ServiceRequestCreate(client_id=client_id, pickup_lat=18.4 + i % 100 * 0.002, pickup_lng=-69.9,
+                             destination_lat=18.6, destination_lng=-69.8)
+        for i in range(count)
+    ]
+
+
+async def _one_by_one(items) -> None:
+    async with AsyncSessionLocal() as db:
+        for item in items:
+            await create_service_request(db, item, "benchmark")
+
+
+async def _batch(items) -> None:
+    async with AsyncSessionLocal() as db:
+        created, errors = await create_service_requests(db, list(enumerate(items)), "benchmark")
+        assert len(created) == len(items) and not errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    args = parser.parse_args()
+    items = _items(_seed(), args.items)
+
+    async def run_all():
+        for label, fn in (("uno a uno", _one_by_one), ("lote", _batch)):
+            started = time.perf_counter()
+            await fn(items)
+            elapsed = time.perf_counter() - started
+            print(f"{label:10s} {len(items):,} solicitudes en {elapsed:6.2f} s → {len(items) / elapsed:10,.0f} filas/s")
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark de polling: clientes que consultan GET /services/{id} en bucle
+mientras el servicio cambia de estado de vez en cuando. Compara
+
+    simple       sin If-None-Match (comportamiento anterior)
+    etag         If-None-Match, caché de versiones desactivada (304 tras consultar la BD)
+    etag+caché   If-None-Match con la caché de versiones (304 sin consultar la BD)
+
+en bytes de cuerpo transferidos y sentencias SQL (cabecera X-DB-Query-Count).
+
+Uso:
+    DATABASE_URL=sqlite:///bench_polling.db python -m benchmarks.bench_conditional_get [--services 50] [--polls 40]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_polling.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import httpx
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.etag import entity_versions
+from app.core.lookups import lookups
+from app.crud.service import update_service_status
+from app.database.init_db import init_db
+from app.database.models import Service, User
+from app.database.session import AsyncSessionLocal, SessionLocal
+from app.main import app
+
+# Cada cuántas rondas de polling cambia de estado cada servicio
+CHANGE_EVERY = 10
+
+
+def _seed(services: int) -> tuple[int, list[int]]:
+    init_db()
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+        client = db.query(User).filter(User.email == "bench-poll@gruago.test").first()
+        if client is None:
+            client = User(email="bench-poll@gruago.test", name="bench", hashed_password="x",
+                          role_id=lookups.roles.id_of("client"))
+            db.add(client)
+            db.commit()
+        ids = db.execute(insert(Service).returning(Service.id), [
+            dict(client_id=client.id, pickup_lat=18.5, pickup_lng=-69.9, destination_lat=18.6,
+                 destination_lng=-69.8, status_id=lookups.statuses.id_of("pending"))
+            for _ in range(services)
+        ]).scalars().all()
+        db.commit()
+        return client.id, sorted(ids)
+    finally:
+        db.close()
+
+
+async def _change(service_id: int, round_no: int, client_id: int) -> None:
+    # Alterna aceptado / cancelado para que la versión cambie en cada paso
+    async with AsyncSessionLocal() as db:
+        status = "accepted" if round_no // CHANGE_EVERY % 2 else "cancelled"
+        try:
+            await update_service_status(db, service_id, status, client_id)
+        except ValueError:
+            pass
+
+
+async def _poll(client: httpx.AsyncClient, ids: list[int], polls: int, conditional: bool, client_id: int) -> dict:
+    etags: dict[int, str] = {}
+    totals = {"requests": 0, "not_modified": 0, "bytes": 0, "queries": 0}
+    started = time.perf_counter()
+    for round_no in range(polls):
+        if round_no and round_no % CHANGE_EVERY == 0:
+            for service_id in ids:
+                await _change(service_id, round_no, client_id)
+        for service_id in ids:
+            headers = {"If-None-Match": etags[service_id]} if conditional and service_id in etags else {}
+            response = await client.get(f"/services/{service_id}", headers=headers)
+            totals["requests"] += 1
+            totals["bytes"] += len(response.content)
+            totals["queries"] += int(response.headers.get("x-db-query-count", 0))
+            if response.status_code == 304:
+                totals["not_modified"] += 1
+            elif "etag" in response.headers:
+                etags[service_id] = response.headers["etag"]
+    totals["seconds"] = time.perf_counter() - started
+    return totals
+
+
+async def _run(services: int, polls: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {}
+        for label, conditional, cache in (("simple", False, True), ("etag", True, False), ("etag+caché", True, True)):
+            client_id, ids = _seed(services)  # servicios nuevos en cada modo
+            entity_versions.max_entries = settings.ETAG_CACHE_MAX_ENTRIES if cache else 0
+            entity_versions._entries.clear()
+            results[label] = await _poll(client, ids, polls, conditional, client_id)
+
+    base = results["simple"]
+    for label, r in results.items():
+        print(f"{label:11s} peticiones={r['requests']:6d}  304={r['not_modified']:6d}  "
+              f"cuerpo={r['bytes'] / 1024:8.1f} KiB ({r['bytes'] / base['bytes']:5.0%})  "
+              f"sentencias SQL={r['queries']:6d} ({r['queries'] / base['queries']:5.0%})  "
+              f"tiempo={r['seconds']:5.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", type=int, default=50)
+    parser.add_argument("--polls", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(_run(args.services, args.polls))
+
+
+if __name__ == "__main__":
+    main()
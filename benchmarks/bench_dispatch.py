@@ -0,0 +1,55 @@
+"""
+Benchmark del cálculo de asignación de una ronda de despacho.
+
+Uso:
+    python -m benchmarks.bench_dispatch [--services 5000] [--drivers 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import numpy as np
+
+from app.core.dispatch import DriverPosition, compute_assignment
+from app.core.spatial_index import IndexedService
+
+
+def _random_points(rng, n, lat0=18.45, lng0=-69.95, span=0.5):
+    return lat0 + rng.random(n) * span, lng0 + rng.random(n) * span
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", type=int, default=5000)
+    parser.add_argument("--drivers", type=int, default=2000)
+    parser.add_argument("--max-distance-km", type=float, default=25.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    s_lat, s_lng = _random_points(rng, args.services)
+    d_lat, d_lng = _random_points(rng, args.drivers)
+    services = [IndexedService(i, 0, s_lat[i], s_lng[i], 0.0, 0.0) for i in range(args.services)]
+    drivers = [DriverPosition(i, d_lat[i], d_lng[i]) for i in range(args.drivers)]
+
+    for label, max_cells in (("greedy", 0), ("optimal", args.services * args.drivers)):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            assignments, solver = compute_assignment(services, drivers, args.max_distance_km, max_cells)
+            timings.append(time.perf_counter() - started)
+        total_km = sum(a.distance_km for a in assignments)
+        print(
+            f"{label:8s} solver={solver:8s} {args.services}x{args.drivers} "
+            f"asignados={len(assignments)} distancia_total={total_km:,.1f} km "
+            f"mediana={np.median(timings) * 1000:.1f} ms max={max(timings) * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark del broker de eventos: fan-out a muchos suscriptores inactivos
+en un solo worker.
+
+Uso:
+    python -m benchmarks.bench_event_fanout [--subscribers 10000] [--events 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.events import EventBroker
+
+
+async def _consumer(subscription, expected: int, done: asyncio.Event, remaining: list):
+    for _ in range(expected):
+        await subscription.get()
+    remaining[0] -= 1
+    if not remaining[0]:
+        done.set()
+
+
+async def main_async(subscribers: int, events: int):
+    broker = EventBroker(max_queue=16, max_dropped=64)
+    payload = {"id": 1, "client_id": 1, "driver_id": 2, "status": "accepted", "updated_at": "2026-01-01T00:00:00"}
+
+    # 1) Todos los suscriptores escuchan el mismo tópico (peor caso de fan-out)
+    tracemalloc.start()
+    subs = [broker.subscribe(["service:1"]) for _ in range(subscribers)]
+    done, remaining = asyncio.Event(), [subscribers]
+    tasks = [asyncio.create_task(_consumer(s, events, done, remaining)) for s in subs]
+    await asyncio.sleep(0)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    publish_time = 0.0
+    for _ in range(events):
+        t = time.perf_counter()
+        broker.publish(["service:1"], "service.status", payload)
+        publish_time += time.perf_counter() - t
+        await asyncio.sleep(0)
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    print(
+        f"mismo tópico: {subscribers:,} suscriptores, {events} eventos -> "
+        f"publish {publish_time / events * 1000:.2f} ms/evento, "
+        f"entrega completa {elapsed / events * 1000:.2f} ms/evento, "
+        f"{memory / subscribers:,.0f} B/suscriptor (con su tarea consumidora)"
+    )
+    for s in subs:
+        broker.unsubscribe(s)
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # 2) Un tópico por usuario (caso real): publicar solo toca a los interesados
+    subs = [broker.subscribe([f"user:{i}"]) for i in range(subscribers)]
+    started = time.perf_counter()
+    for i in range(events * 100):
+        broker.publish([f"service:{i}", f"user:{i % subscribers}"], "service.status", payload)
+    elapsed = time.perf_counter() - started
+    print(
+        f"tópicos por usuario: {subscribers:,} suscriptores inactivos -> "
+        f"{elapsed / (events * 100) * 1e6:.1f} µs por publish"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.subscribers, args.events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark de memoria: listar todos los servicios con `.all()` frente a la
+exportación NDJSON con cursor de servidor.
+
+Uso:
+    DATABASE_URL=sqlite:///bench_export.db python -m benchmarks.bench_export_memory [--rows 200000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_export.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import func, insert, select
+
+from app.core.lookups import lookups
+from app.core.pagination import ndjson_stream
+from app.crud.service import iter_services_export
+from app.database.init_db import init_db
+from app.database.models import Service, User
+from app.database.session import AsyncSessionLocal, SessionLocal
+from app.schemas.service import ServiceResponse
+
+
+def _seed(rows: int) -> None:
+    init_db()
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+        client = db.query(User).filter(User.email == "bench-export@gruago.test").first()
+        if client is None:
+            client = User(email="bench-export@gruago.test", name="bench", hashed_password="x",
+                          role_id=lookups.roles.id_of("client"))
+            db.add(client)
+            db.commit()
+        missing = rows - db.scalar(select(func.count(Service.id)))
+        pending = lookups.statuses.id_of("pending")
+        for start in range(0, max(missing, 0), 10_000):
+            db.execute(insert(Service), [
+                dict(client_id=client.id, pickup_lat=18.5, pickup_lng=-69.9, destination_lat=18.6,
+                     destination_lng=-69.8, status_id=pending)
+                for _ in range(min(10_000, missing - start))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+async def _legacy() -> int:
+    # Flujo anterior: cargar todos los objetos ORM y serializar la lista completa
+    async with AsyncSessionLocal() as db:
+        services = (await db.execute(select(Service))).scalars().all()
+        body = "[" + ",".join(ServiceResponse.model_validate(s).model_dump_json() for s in services) + "]"
+        return len(body)
+
+
+async def _export() -> int:
+    size = 0
+    async for chunk in ndjson_stream(iter_services_export()):
+        size += len(chunk)
+    return size
+
+
+async def _measure(label: str, fn) -> None:
+    # El tiempo se mide sin tracemalloc, que lo distorsiona bastante
+    started = time.perf_counter()
+    size = await fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    await fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:8s} {size / 1e6:8.1f} MB generados  pico={peak / 1e6:8.1f} MB  tiempo={elapsed:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    _seed(args.rows)
+
+    async def run_all():
+        await _measure("all()", _legacy)
+        await _measure("ndjson", _export)
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
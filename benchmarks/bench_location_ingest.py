@@ -0,0 +1,130 @@
+"""
+Benchmark de ingesta de ubicaciones de conductores a través del endpoint
+POST /drivers/me/location (autenticación, validación, middlewares y
+almacén en memoria) y de la persistencia en lote.
+
+Sin --url la app corre en el mismo proceso (httpx + ASGI); con --url las
+peticiones van por HTTP a un servidor levantado aparte (app/server.py) con
+el mismo SECRET_KEY. Como referencia se mide también `update()` a solas.
+
+Uso:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_location_ingest [--drivers 2000] [--requests 20000] [--concurrency 50]
+    SECRET_KEY=... python -m benchmarks.bench_location_ingest --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_locations.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import httpx
+
+from app.core.config import settings
+from app.core.location_store import DriverLocationStore, driver_locations
+from app.core.security import create_access_token
+from app.database.init_db import init_db
+from app.database.session import SessionLocal
+
+
+def _tokens(drivers: int) -> list[dict]:
+    return [
+        {"Authorization": "Bearer " + create_access_token(data={"email": f"driver{i}@gruago.test", "role": "driver", "id": i})}
+        for i in range(1, drivers + 1)
+    ]
+
+
+async def _ingest(client: httpx.AsyncClient, headers: list[dict], requests: int, concurrency: int) -> list[float]:
+    rng = random.Random(7)
+    latencies: list[float] = []
+    queue = iter(range(requests))
+
+    async def worker():
+        for _ in queue:
+            body = {"lat": 18.4 + rng.random(), "lng": -69.9 + rng.random(),
+                    "heading": rng.random() * 359, "speed_kmh": rng.random() * 90}
+            started = time.perf_counter()
+            response = await client.post("/drivers/me/location", headers=rng.choice(headers), json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 204:
+                raise RuntimeError(f"respuesta inesperada {response.status_code}: {response.text}")
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def _run_http(url: str, drivers: int, requests: int, concurrency: int) -> None:
+    headers = _tokens(drivers)
+    if url:
+        client = httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=concurrency))
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    async with client:
+        # Una marca de tiempo futura no debe aceptarse
+        future = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+        rejected = await client.post("/drivers/me/location", headers=headers[0],
+                                     json={"lat": 18.5, "lng": -69.9, "recorded_at": future})
+        print(f"recorded_at futuro: HTTP {rejected.status_code}")
+
+        await _ingest(client, headers, min(1000, requests), concurrency)  # calentamiento
+        started = time.perf_counter()
+        latencies = await _ingest(client, headers, requests, concurrency)
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"endpoint: {requests:,} peticiones en {elapsed:.2f} s -> {requests / elapsed:,.0f} posiciones/s  "
+          f"p50={statistics.median(latencies):.2f} ms  p99={latencies[int(len(latencies) * 0.99) - 1]:.2f} ms  "
+          f"(concurrencia {concurrency}{', ' + url if url else ', en proceso'})")
+
+
+def _run_store(drivers: int, updates: int) -> DriverLocationStore:
+    store = DriverLocationStore(flush_interval=0, batch_size=settings.LOCATION_FLUSH_BATCH_SIZE)
+    rng = random.Random(7)
+    fixes = [
+        (rng.randrange(1, drivers + 1), 18.4 + rng.random(), -69.9 + rng.random(), rng.random() * 359, rng.random() * 90)
+        for _ in range(updates)
+    ]
+    started = time.perf_counter()
+    for driver_id, lat, lng, heading, speed in fixes:
+        store.update(driver_id, lat, lng, heading, speed)
+    elapsed = time.perf_counter() - started
+    print(f"solo almacén (referencia): {updates:,} update() en {elapsed:.3f} s -> {updates / elapsed:,.0f} posiciones/s")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--url", default="", help="servidor ya levantado; por defecto la app en proceso")
+    args = parser.parse_args()
+
+    asyncio.run(_run_http(args.url, args.drivers, args.requests, args.concurrency))
+    if args.url:
+        return
+
+    init_db()
+    _run_store(args.drivers, args.requests)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        flushed = driver_locations.flush(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"flush:   {flushed:,} filas en {elapsed * 1000:.1f} ms -> {flushed / elapsed:,.0f} filas/s")
+
+    started = time.perf_counter()
+    positions = driver_locations.fresh_positions(settings.DRIVER_LOCATION_MAX_AGE_SECONDS)
+    print(f"lectura: {len(positions):,} conductores disponibles en {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark del coste de instrumentación por petición.
+
+Llama directamente a una aplicación ASGI mínima con y sin los middlewares de
+métricas (HTTPMetricsMiddleware y QueryStatsMiddleware), sin red ni
+servidor, para aislar su coste. También mide `render_prometheus`.
+
+Uso:
+    python -m benchmarks.bench_metrics_overhead [--requests 200000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.http_metrics import HTTPMetricsMiddleware
+from app.core.metrics import render_prometheus
+from app.core.query_stats import QueryStatsMiddleware
+
+
+class _Route:
+    path = "/services/{service_id}"
+
+
+async def _endpoint(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+async def _run(app, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        scope = {"type": "http", "method": "GET", "path": f"/services/{i}"}
+        await app(scope, _receive, _send)
+    return time.perf_counter() - started
+
+
+async def main_async(requests: int):
+    apps = {
+        "sin métricas": _endpoint,
+        "http": HTTPMetricsMiddleware(_endpoint),
+        "http + consultas": HTTPMetricsMiddleware(QueryStatsMiddleware(_endpoint)),
+    }
+    baseline = None
+    for label, app in apps.items():
+        await _run(app, 1000)  # calentamiento
+        elapsed = await _run(app, requests)
+        per_request = elapsed / requests * 1e6
+        baseline = per_request if baseline is None else baseline
+        print(f"{label:18s} {per_request:6.2f} µs/petición  (+{per_request - baseline:5.2f} µs)")
+
+    started = time.perf_counter()
+    body = render_prometheus()
+    print(f"render /metrics    {(time.perf_counter() - started) * 1000:.2f} ms ({len(body):,} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests))
+
+
+if __name__ == "__main__":
+    main()
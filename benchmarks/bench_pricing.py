@@ -0,0 +1,62 @@
+"""
+Benchmark del motor de cotización: coste de una cotización calculada, una
+servida desde la caché por celdas y el camino vectorizado por lotes.
+
+Uso:
+    python -m benchmarks.bench_pricing [--quotes 100000] [--batch 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.pricing import quote_engine
+
+
+def _trips(count: int, rng: random.Random):
+    # Santo Domingo y alrededores
+    return [
+        (18.40 + rng.random() * 0.2, -70.05 + rng.random() * 0.3, 18.40 + rng.random() * 0.2, -70.05 + rng.random() * 0.3)
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quotes", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    trips = _trips(args.quotes, random.Random(3))
+
+    quote_engine.clear()
+    started = time.perf_counter()
+    for trip in trips:
+        quote_engine.quote(*trip)
+    miss_us = (time.perf_counter() - started) / len(trips) * 1e6
+
+    started = time.perf_counter()
+    for trip in trips:
+        quote_engine.quote(*trip)
+    hit_us = (time.perf_counter() - started) / len(trips) * 1e6
+
+    batch = trips[:args.batch]
+    columns = list(zip(*batch))
+    rounds = 200
+    started = time.perf_counter()
+    for _ in range(rounds):
+        quotes = quote_engine.quote_many(*columns)
+    batch_ms = (time.perf_counter() - started) / rounds * 1000
+
+    assert [q.price for q in quotes] == [quote_engine.quote(*t).price for t in batch]
+    print(f"calculada (miss)     {miss_us:6.2f} µs/cotización")
+    print(f"caché por celdas     {hit_us:6.2f} µs/cotización")
+    print(f"lote vectorizado     {batch_ms:6.2f} ms por {len(batch)} ({batch_ms * 1000 / len(batch):.2f} µs/cotización)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark de renovación de sesión: POST /auth/login (bcrypt) frente a
+POST /auth/refresh (HMAC + rotación en BD), en el mismo proceso.
+
+Uso:
+    DATABASE_URL=sqlite:///bench_refresh.db python -m benchmarks.bench_refresh [--requests 50]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_refresh.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+from app.core.lookups import lookups
+from app.core.security import get_password_hash
+from app.database.init_db import init_db
+from app.database.models import User
+from app.database.session import SessionLocal
+from app.main import app
+
+EMAIL = "bench-refresh@gruago.test"
+PASSWORD = "benchmark-password"
+
+
+def _seed() -> None:
+    init_db()
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+        if db.query(User).filter(User.email == EMAIL).first() is None:
+            db.add(User(email=EMAIL, name="bench", hashed_password=get_password_hash(PASSWORD),
+                        role_id=lookups.roles.id_of("driver")))
+            db.commit()
+    finally:
+        db.close()
+
+
+async def _timed(call) -> tuple[float, float, httpx.Response]:
+    cpu, wall = time.process_time(), time.perf_counter()
+    response = await call()
+    response.raise_for_status()
+    return (time.perf_counter() - wall) * 1000, (time.process_time() - cpu) * 1000, response
+
+
+async def _run(requests: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        login = lambda: client.post("/auth/login", params={"email": EMAIL, "password": PASSWORD})
+        _, _, response = await _timed(login)  # calentamiento
+        refresh_token = response.json()["refresh_token"]
+
+        samples = {"login": [], "refresh": []}
+        for _ in range(requests):
+            wall, cpu, _ = await _timed(login)
+            samples["login"].append((wall, cpu))
+            wall, cpu, response = await _timed(
+                lambda: client.post("/auth/refresh", json={"refresh_token": refresh_token}))
+            samples["refresh"].append((wall, cpu))
+            refresh_token = response.json()["refresh_token"]
+
+    medians = {}
+    for label, values in samples.items():
+        wall = statistics.median(v[0] for v in values)
+        cpu = statistics.median(v[1] for v in values)
+        medians[label] = wall
+        print(f"{label:8s} latencia={wall:8.2f} ms  cpu del proceso={cpu:7.2f} ms  (mediana de {len(values)})")
+    print(f"refresh es {medians['login'] / medians['refresh']:.0f}x más rápido que login")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    _seed()
+    asyncio.run(_run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark de serialización: GET /services/ con 10k filas por petición,
+serializando como antes (`response_model` + JSONResponse: valida, vuelca a
+objetos Python en modo JSON y luego pasa por `json.dumps`) frente a la
+ruta actual (TypeAdapter directo a bytes con `model_response`).
+
+Mide tiempo de CPU del proceso por petición (`time.process_time`); la
+consulta es la misma en ambos casos, así que la diferencia es serialización.
+
+Uso:
+    DATABASE_URL=sqlite:///bench_serialization.db python -m benchmarks.bench_serialization [--rows 10000] [--requests 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_serialization.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("PAGINATION_MAX_LIMIT", "100000")
+
+import httpx
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, insert, select
+
+from app.core.lookups import lookups
+from app.crud.service import get_services
+from app.database.dependencies import get_async_db
+from app.database.init_db import init_db
+from app.database.models import Service, User
+from app.database.session import SessionLocal
+from app.main import app
+from app.schemas.service import ServiceResponse
+
+
+def _seed(rows: int) -> None:
+    init_db()
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+        client = db.query(User).filter(User.email == "bench-json@gruago.test").first()
+        if client is None:
+            client = User(email="bench-json@gruago.test", name="bench", hashed_password="x",
+                          role_id=lookups.roles.id_of("client"))
+            db.add(client)
+            db.commit()
+        missing = rows - db.scalar(select(func.count(Service.id)))
+        pending = lookups.statuses.id_of("pending")
+        for start in range(0, max(missing, 0), 10_000):
+            db.execute(insert(Service), [
+                dict(client_id=client.id, pickup_lat=18.5, pickup_lng=-69.9, destination_lat=18.6,
+                     destination_lng=-69.8, status_id=pending)
+                for _ in range(min(10_000, missing - start))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+# Ruta con el flujo anterior, para comparar en el mismo proceso
+legacy = APIRouter(default_response_class=JSONResponse)
+
+
+@legacy.get("/bench/services-legacy", response_model=List[ServiceResponse])
+async def services_legacy(limit: int, db=Depends(get_async_db)):
+    services, _ = await get_services(db, limit)
+    return services
+
+
+async def _request(client: httpx.AsyncClient, path: str, rows: int) -> tuple[float, int]:
+    started = time.process_time()
+    response = await client.get(path, params={"limit": rows})
+    elapsed = time.process_time() - started
+    response.raise_for_status()
+    return elapsed * 1000, len(response.content)
+
+
+async def _run(rows: int, requests: int) -> None:
+    app.include_router(legacy)
+    paths = {"anterior": "/bench/services-legacy", "rápida": "/services/"}
+    samples = {label: [] for label in paths}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in paths.values():
+            await _request(client, path, rows)  # calentamiento
+        # Peticiones alternadas para que el ruido afecte igual a ambas rutas
+        for _ in range(requests):
+            for label, path in paths.items():
+                samples[label].append(await _request(client, path, rows))
+
+    medians = {}
+    for label, values in samples.items():
+        medians[label] = statistics.median(cpu for cpu, _ in values)
+        print(f"{label:9s} cpu={medians[label]:7.1f} ms/petición (mediana)  cuerpo={values[0][1] / 1e6:.2f} MB")
+    saved = medians["anterior"] - medians["rápida"]
+    print(f"CPU ahorrada: {saved:.1f} ms por petición ({saved / medians['anterior']:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    _seed(args.rows)
+    asyncio.run(_run(args.rows, args.requests))
+
+
+if __name__ == "__main__":
+    main()
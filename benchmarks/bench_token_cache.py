@@ -0,0 +1,57 @@
+"""
+Microbenchmark de `get_current_user` con y sin la caché de tokens verificados.
+
+Uso:
+    python -m benchmarks.bench_token_cache [--calls 200000] [--tokens 100]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import security
+from app.core.security import create_access_token, get_current_user
+from app.core.token_cache import VerifiedTokenCache, token_cache_hits, token_cache_misses
+
+
+async def _run(credentials, calls: int) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        await get_current_user(credentials[i % len(credentials)])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--tokens", type=int, default=100, help="clientes distintos haciendo polling")
+    args = parser.parse_args()
+
+    credentials = [
+        HTTPAuthorizationCredentials(
+            scheme="Bearer",
+            credentials=create_access_token({"email": f"user{i}@gruago.test", "role": "driver", "id": i + 1}),
+        )
+        for i in range(args.tokens)
+    ]
+
+    for label, max_entries in (("sin caché", 0), ("con caché", 10_000)):
+        security.token_cache = VerifiedTokenCache(max_entries)
+        elapsed = asyncio.run(_run(credentials, args.calls))
+        print(
+            f"{label:10s} {args.calls:,} llamadas en {elapsed:.3f} s -> "
+            f"{args.calls / elapsed:,.0f} llamadas/s ({elapsed / args.calls * 1e6:.2f} µs/llamada)"
+        )
+    print(f"estadísticas: {len(security.token_cache)} entradas, "
+          f"{token_cache_hits.value:,.0f} aciertos, {token_cache_misses.value:,.0f} verificaciones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de escrituras: sentencias SQL (cabecera X-DB-Query-Count) y
+latencia de cada endpoint que escribe, en el mismo proceso. Sirve para
+comparar ramas: cada sentencia es un viaje de ida y vuelta a la BD.
+
+    registro        POST /auth/register
+    perfil          PUT /users/me
+    contraseña      PUT /users/me/password
+    olvido          POST /auth/forgot-password
+    reset           POST /auth/reset-password
+    solicitud       POST /services/request
+    aceptar         PUT /services/services/{id}/accept
+    eliminar        DELETE /users/me
+
+Uso:
+    DATABASE_URL=sqlite:///bench_writes.db python -m benchmarks.bench_write_roundtrips [--rounds 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_writes.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("PASSWORD_RESET_LOG_TOKENS", "true")  # sin SMTP: el token va al log
+
+import httpx
+
+from app.core.lookups import lookups
+from app.core.security import create_password_reset_token
+from app.database.init_db import init_db
+from app.database.session import SessionLocal
+from app.main import app
+
+PASSWORD = "benchmark-password"
+
+
+async def _call(samples: dict, label: str, call) -> httpx.Response:
+    started = time.perf_counter()
+    response = await call()
+    elapsed = (time.perf_counter() - started) * 1000
+    response.raise_for_status()
+    samples.setdefault(label, []).append((int(response.headers.get("x-db-query-count", 0)), elapsed))
+    return response
+
+
+async def _register(client: httpx.AsyncClient, samples: dict, role: str) -> tuple[int, str, dict]:
+    email = f"bench-{uuid.uuid4().hex[:12]}@gruago.test"
+    user = (await _call(samples, "registro", lambda: client.post("/auth/register", json={
+        "email": email, "name": "bench", "password": PASSWORD, "role_id": lookups.roles.id_of(role),
+    }))).json()
+    login = await client.post("/auth/login", params={"email": email, "password": PASSWORD})
+    login.raise_for_status()
+    return user["id"], email, {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+async def _round(client: httpx.AsyncClient, samples: dict) -> None:
+    client_id, email, headers = await _register(client, samples, "client")
+    _, _, driver_headers = await _register(client, samples, "driver")
+
+    await _call(samples, "perfil", lambda: client.put("/users/me", headers=headers, json={"name": "bench 2"}))
+    await _call(samples, "contraseña", lambda: client.put("/users/me/password", headers=headers, json={
+        "old_password": PASSWORD, "new_password": PASSWORD,
+    }))
+    # El token llega por correo (aquí, al log): se firma igual que en el endpoint
+    await _call(samples, "olvido", lambda: client.post("/auth/forgot-password", params={"email": email}))
+    reset_token = create_password_reset_token(client_id, email)
+    await _call(samples, "reset", lambda: client.post(
+        "/auth/reset-password", params={"token": reset_token, "new_password": PASSWORD}))
+
+    # El cambio de contraseña revoca las sesiones: se vuelve a entrar
+    login = await client.post("/auth/login", params={"email": email, "password": PASSWORD})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    service = (await _call(samples, "solicitud", lambda: client.post("/services/request", headers=headers, json={
+        "client_id": client_id, "pickup_lat": 18.5, "pickup_lng": -69.9,
+        "destination_lat": 18.6, "destination_lng": -69.8,
+    }))).json()
+    await _call(samples, "aceptar", lambda: client.put(f"/services/services/{service['id']}/accept", headers=driver_headers))
+
+    # Sin servicios asociados para que el borrado no choque con las FK
+    _, _, temp_headers = await _register(client, {}, "client")
+    await _call(samples, "eliminar", lambda: client.delete("/users/me", headers=temp_headers))
+
+
+async def _run(rounds: int) -> None:
+    samples: dict[str, list[tuple[int, float]]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await _round(client, {})  # calentamiento
+        for _ in range(rounds):
+            await _round(client, samples)
+
+    for label, values in samples.items():
+        queries = statistics.mean(v[0] for v in values)
+        latency = statistics.median(v[1] for v in values)
+        print(f"{label:11s} sentencias SQL={queries:5.1f}  latencia={latency:8.2f} ms  (mediana de {len(values)})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        lookups.load(db)
+    finally:
+        db.close()
+    asyncio.run(_run(args.rounds))
+
+
+if __name__ == "__main__":
+    main()